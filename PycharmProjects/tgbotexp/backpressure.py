@@ -0,0 +1,98 @@
+import time
+import heapq
+import asyncio
+import itertools
+from typing import Any, Dict, List, Optional
+
+# Приоритеты обновлений: чем меньше число, тем раньше обрабатываем
+PRIORITY_PAYMENT = 0
+PRIORITY_IN_PROGRESS = 1
+PRIORITY_NEW = 2
+
+
+class QueuedUpdate:
+    __slots__ = ("priority", "seq", "enqueued", "bot", "update")
+
+    def __init__(self, priority: int, seq: int, bot, update):
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.bot = bot
+        self.update = update
+
+    def __lt__(self, other: "QueuedUpdate") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class UpdateQueue:
+    """
+    Ограниченная очередь обновлений с приоритетами.
+
+    Если очередь заполнена, новое обновление вытесняет самое неприоритетное
+    из ожидающих (среди равных - самое свежее) либо отклоняется само.
+    Вытесненные обновления возвращаются вызывающему для ответа "заняты".
+    """
+
+    def __init__(self, maxsize: int):
+        if maxsize <= 0:
+            raise ValueError("maxsize должен быть больше 0")
+        self.maxsize = maxsize
+        self._heap: List[QueuedUpdate] = []
+        self._seq = itertools.count()
+        self._not_empty = asyncio.Condition()
+
+        self.shed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.dequeued = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    async def put(self, priority: int, bot, update) -> Optional[QueuedUpdate]:
+        """Ставит обновление в очередь. Возвращает отброшенное обновление, если оно есть."""
+        item = QueuedUpdate(priority, next(self._seq), bot, update)
+        rejected = None
+
+        if len(self._heap) >= self.maxsize:
+            worst = max(self._heap)
+            if item < worst:
+                self._heap.remove(worst)
+                heapq.heapify(self._heap)
+                rejected = worst
+            else:
+                rejected = item
+
+        if rejected is not item:
+            heapq.heappush(self._heap, item)
+            async with self._not_empty:
+                self._not_empty.notify()
+
+        if rejected is not None:
+            self.shed += 1
+        return rejected
+
+    async def get(self) -> QueuedUpdate:
+        async with self._not_empty:
+            await self._not_empty.wait_for(lambda: bool(self._heap))
+            item = heapq.heappop(self._heap)
+
+        waited = time.monotonic() - item.enqueued
+        self.dequeued += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        return item
+
+    def drain_pending(self) -> List[QueuedUpdate]:
+        items, self._heap = self._heap, []
+        return items
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self._heap),
+            "max_depth": self.maxsize,
+            "shed": self.shed,
+            "processed": self.dequeued,
+            "wait_avg_ms": self.wait_total / self.dequeued * 1000 if self.dequeued else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+        }
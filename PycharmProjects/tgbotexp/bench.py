@@ -0,0 +1,168 @@
+"""
+Бенчмарк разбора и обработки обновлений в обычном и быстром режиме.
+
+    python bench.py                  # оба режима, каждый в отдельном процессе
+    python bench.py --mode fast      # только быстрый режим
+    python bench.py --updates 20000
+
+Сеть не используется: ответы getUpdates собираются заранее, а запросы
+хендлеров к Bot API проходят через сериализацию и разбор ответа локально.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+
+BATCH_SIZE = 100  # столько обновлений Telegram отдает за один getUpdates
+
+SEND_MESSAGE_RESPONSE = json.dumps({
+    "ok": True,
+    "result": {"message_id": 1, "date": 0, "chat": {"id": 1, "type": "private"}, "text": "ok"},
+})
+TRUE_RESPONSE = json.dumps({"ok": True, "result": True})
+
+
+def build_batches(count: int):
+    """Пары "/order" + выбор типа торта от разных пользователей, пачками как в getUpdates."""
+    updates = []
+    for index in range(count):
+        user_id = 100000 + index // 2
+        text = "/order" if index % 2 == 0 else "🎂 Бенто-торт (400-450г)"
+        message = {
+            "message_id": index + 1,
+            "date": 1700000000,
+            "chat": {"id": user_id, "type": "private", "first_name": "Гость"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Гость", "language_code": "ru"},
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        updates.append({"update_id": index + 1, "message": message})
+
+    return [
+        json.dumps({"ok": True, "result": updates[start:start + BATCH_SIZE]}, ensure_ascii=False)
+        for start in range(0, count, BATCH_SIZE)
+    ]
+
+
+async def run_mode(mode: str, count: int) -> dict:
+    from aiogram import Bot
+    from aiogram.client.session.base import BaseSession
+    from aiogram.methods import GetUpdates, SendMessage
+
+    import main
+
+    class LocalSession(BaseSession):
+        """Сессия без сети: сериализует запрос и разбирает заранее заготовленный ответ."""
+
+        async def make_request(self, bot, method, timeout=None):
+            files = {}
+            for value in method.model_dump(warnings=False).values():
+                self.prepare_value(value, bot=bot, files=files)
+            content = SEND_MESSAGE_RESPONSE if isinstance(method, SendMessage) else TRUE_RESPONSE
+            return self.check_response(bot, method, 200, content).result
+
+        async def stream_content(self, *args, **kwargs):
+            raise NotImplementedError
+
+        async def close(self):
+            pass
+
+    if mode == "fast":
+        codec, json_loads, json_dumps = main.json_codec()
+        session = LocalSession(json_loads=json_loads, json_dumps=json_dumps)
+    else:
+        codec = "json"
+        session = LocalSession()
+
+    tenant = main.Tenant(
+        name="bench",
+        token="123456:bench-token",
+        admin_chat_id=1,
+        payment_token=None,
+        **{key: dict(value) for key, value in main.DEFAULT_CATALOG.items()},
+    )
+    bot = Bot(token=tenant.token, session=session)
+    main.setup_middlewares({bot.id: tenant})
+
+    batches = build_batches(count)
+    get_updates = GetUpdates()
+
+    # Прогрев: pydantic достраивает схемы моделей при первом использовании
+    for update in session.check_response(bot, get_updates, 200, build_batches(BATCH_SIZE)[0]).result:
+        update = update.model_copy(update={"update_id": -update.update_id})
+        await main.dp.feed_update(bot, update)
+
+    # 1. Только разбор ответов getUpdates в объекты Update
+    started = time.perf_counter()
+    for content in batches:
+        session.check_response(bot, get_updates, 200, content)
+    parse_time = time.perf_counter() - started
+
+    # 2. Разбор + обработка диспетчером (фильтры, FSM, хендлеры, ответы)
+    started = time.perf_counter()
+    for content in batches:
+        updates = session.check_response(bot, get_updates, 200, content).result
+        await asyncio.gather(*(main.dp.feed_update(bot, update) for update in updates))
+    dispatch_time = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "loop": type(asyncio.get_running_loop()).__module__.split(".")[0],
+        "codec": codec,
+        "updates": count,
+        "parse_per_sec": count / parse_time,
+        "dispatch_per_sec": count / dispatch_time,
+    }
+
+
+def run_in_process(mode: str, count: int):
+    # Настраиваем бота до импорта main: без лишних логов и без токенов из .env
+    os.environ["LOG_LEVEL"] = "WARNING"
+    os.environ["FAST_MODE"] = "true" if mode == "fast" else "false"
+
+    if mode == "fast":
+        from fastmode import install_event_loop_policy
+        install_event_loop_policy()
+
+    result = asyncio.run(run_mode(mode, count))
+
+    from logging_setup import shutdown_logging
+    shutdown_logging()
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("std", "fast", "all"), default="all")
+    parser.add_argument("--updates", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.mode != "all":
+        run_in_process(args.mode, args.updates)
+        return
+
+    # Event loop и кодек выбираются при старте, поэтому каждый режим - в своем процессе
+    results = []
+    for mode in ("std", "fast"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--updates", str(args.updates)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'режим':<6} {'loop':<8} {'json':<7} {'разбор, upd/s':>14} {'разбор+обработка, upd/s':>25}")
+    for result in results:
+        print(
+            f"{result['mode']:<6} {result['loop']:<8} {result['codec']:<7} "
+            f"{result['parse_per_sec']:>14.0f} {result['dispatch_per_sec']:>25.0f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from orders import OrderJournal
+
+logger = logging.getLogger(__name__)
+
+READ_BATCH = 200
+MAX_ATTEMPTS = 3
+
+
+class RateLimiter:
+    """
+    Не чаще ``rate`` вызовов в секунду (равномерно, без всплесков).
+
+    Один ограничитель можно делить между несколькими рассылками: слот
+    занимается до ожидания, поэтому суммарная скорость не превышает ``rate``.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def _take(iterator: Iterator, count: int) -> List:
+    return list(islice(iterator, count))
+
+
+async def _read_batch(iterator: Iterator, count: int) -> List:
+    read = asyncio.ensure_future(asyncio.to_thread(_take, iterator, count))
+    try:
+        return await asyncio.shield(read)
+    except asyncio.CancelledError:
+        # Поток чтения не прервать: дожидаемся его, иначе генератор журнала нельзя закрыть
+        await asyncio.wait({read})
+        raise
+
+
+class OrderBroadcast:
+    """
+    Рассылка персональных сообщений клиентам по журналу заказов.
+
+    Журнал читается потоково пачками по READ_BATCH строк, поэтому память
+    не зависит от числа получателей. После каждого отправленного сообщения
+    позиция сохраняется в файл прогресса: прерванная рассылка продолжается
+    с места остановки, а повторно может уйти не больше одного сообщения,
+    отправленного прямо в момент падения. Повторный запуск завершенной
+    рассылки дописывает только заказы, появившиеся в журнале после нее.
+
+    ``limiter`` общий для всех рассылок одного бота, чтобы вместе они
+    не превышали лимит Telegram.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        journal: OrderJournal,
+        tenant_name: str,
+        campaign_id: str,
+        select: Callable[[Dict[str, Any]], bool],
+        render: Callable[[Dict[str, Any]], str],
+        limiter: RateLimiter,
+    ):
+        self.bot = bot
+        self.journal = journal
+        self.tenant_name = tenant_name
+        self.campaign_id = campaign_id
+        self.select = select
+        self.render = render
+        self.limiter = limiter
+        self.progress_path = os.path.join(journal.directory, f"{tenant_name}.{campaign_id}.progress.json")
+        # Счетчики в файле прогресса - за все запуски, delivered/failed - за текущий
+        self.progress = {"next_line": 0, "delivered": 0, "failed": 0}
+        self.delivered = 0
+        self.failed = 0
+
+    # --- Прогресс ---
+
+    def _load_progress(self):
+        if os.path.exists(self.progress_path):
+            with open(self.progress_path, encoding="utf-8") as f:
+                self.progress.update(json.load(f))
+
+    def _save_progress(self):
+        tmp_path = f"{self.progress_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.progress, f)
+        os.replace(tmp_path, self.progress_path)
+
+    async def _checkpoint(self, next_line: int):
+        self.progress["next_line"] = next_line
+        await asyncio.to_thread(self._save_progress)
+
+    # --- Отправка ---
+
+    async def _send(self, order: Dict[str, Any]) -> bool:
+        chat_id = order.get("chat_id")
+        if not chat_id:
+            return False
+
+        text = self.render(order)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            await self.limiter.wait()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text)
+                return True
+            except TelegramRetryAfter as e:
+                logger.warning(f"Рассылка {self.campaign_id}: лимит Telegram, пауза {e.retry_after} с")
+                await asyncio.sleep(e.retry_after)
+            except (TelegramForbiddenError, TelegramBadRequest) as e:
+                # Клиент заблокировал бота или чат недоступен - повтор не поможет
+                logger.info(f"Рассылка {self.campaign_id}: чат {chat_id} недоступен: {e}")
+                return False
+            except Exception as e:
+                logger.warning(f"Рассылка {self.campaign_id}: ошибка отправки в чат {chat_id} "
+                               f"(попытка {attempt}/{MAX_ATTEMPTS}): {e}")
+                await asyncio.sleep(attempt)
+        return False
+
+    async def run(self) -> Dict[str, Any]:
+        await asyncio.to_thread(self._load_progress)
+        if self.progress["next_line"]:
+            logger.info(f"Рассылка {self.campaign_id}: продолжаем со строки {self.progress['next_line'] + 1}")
+
+        orders = self.journal.iter_orders(self.tenant_name, start_line=self.progress["next_line"])
+        try:
+            while True:
+                batch: List[Tuple[int, Dict[str, Any]]] = await _read_batch(orders, READ_BATCH)
+                if not batch:
+                    break
+
+                for line_no, order in batch:
+                    if not self.select(order):
+                        continue
+                    if await self._send(order):
+                        self.delivered += 1
+                        self.progress["delivered"] += 1
+                    else:
+                        self.failed += 1
+                        self.progress["failed"] += 1
+                    await self._checkpoint(line_no + 1)
+
+                await self._checkpoint(batch[-1][0] + 1)
+        finally:
+            orders.close()
+
+        logger.info(f"Рассылка {self.campaign_id} завершена: {self.stats()}, всего {self.progress}")
+        return {
+            **self.stats(),
+            "total_delivered": self.progress["delivered"],
+            "total_failed": self.progress["failed"],
+        }
+
+    def stats(self) -> Dict[str, int]:
+        return {"delivered": self.delivered, "failed": self.failed}
@@ -0,0 +1,88 @@
+import json
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+from lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CustomerProfiles:
+    """
+    Профили постоянных клиентов: последний подтвержденный заказ и контакт.
+
+    Профили лежат на диске в SQLite (компактный JSON на клиента точки), в
+    памяти держится только LRU недавно активных клиентов - в том числе
+    отметки "профиля нет", чтобы новые клиенты не читали диск на каждом
+    /order. Запросы к базе выполняются в отдельном потоке под блокировкой.
+    """
+
+    def __init__(self, path: str, max_cached: int = 5000):
+        self.path = path
+        self.cache = LRUCache(max_cached)
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            # WAL: запись переживает падение процесса и не блокирует чтение
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                "tenant TEXT NOT NULL, user_id INTEGER NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (tenant, user_id)) WITHOUT ROWID"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _read(self, tenant_name: str, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._open().execute(
+                "SELECT data FROM profiles WHERE tenant = ? AND user_id = ?", (tenant_name, user_id)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def _write(self, tenant_name: str, user_id: int, profile: Dict[str, Any]):
+        raw = json.dumps(profile, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            db = self._open()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO profiles (tenant, user_id, data) VALUES (?, ?, ?)",
+                    (tenant_name, user_id, raw),
+                )
+
+    async def get(self, tenant_name: str, user_id: int) -> Optional[Dict[str, Any]]:
+        key = (tenant_name, user_id)
+        profile = self.cache.get(key, _MISSING)
+        if profile is _MISSING:
+            try:
+                profile = await asyncio.to_thread(self._read, tenant_name, user_id)
+            except (sqlite3.Error, ValueError) as e:
+                # Поврежденный профиль не должен ломать оформление заказа
+                logger.error(f"[{tenant_name}] Не удалось прочитать профиль клиента {user_id}: {e}")
+                return None
+            self.cache[key] = profile
+        return profile
+
+    async def save(self, tenant_name: str, user_id: int, profile: Dict[str, Any]):
+        # Пустые поля не храним - так записи на диске компактнее
+        profile = {name: value for name, value in profile.items() if value not in (None, "", 0)}
+        self.cache[(tenant_name, user_id)] = profile
+        await asyncio.to_thread(self._write, tenant_name, user_id, profile)
+
+    def stats(self) -> Dict[str, int]:
+        return {"cached": len(self.cache), "evicted": self.cache.evictions}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
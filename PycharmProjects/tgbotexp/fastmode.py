@@ -0,0 +1,43 @@
+import json
+import asyncio
+from typing import Any, Callable, Tuple
+
+
+def json_codec() -> Tuple[str, Callable[[Any], Any], Callable[[Any], str]]:
+    """
+    Возвращает (название, loads, dumps) самого быстрого доступного JSON-кодека.
+    Порядок: orjson, ujson, стандартный json.
+    """
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        # aiogram ожидает от dumps строку, а orjson возвращает bytes
+        def orjson_dumps(value: Any) -> str:
+            return orjson.dumps(value).decode()
+
+        return "orjson", orjson.loads, orjson_dumps
+
+    try:
+        import ujson
+    except ImportError:
+        pass
+    else:
+        return "ujson", ujson.loads, ujson.dumps
+
+    return "json", json.loads, json.dumps
+
+
+def install_event_loop_policy() -> str:
+    """
+    Ставит uvloop в качестве event loop, если он установлен (на Windows его нет).
+    Вызывать до asyncio.run(). Возвращает название используемого цикла.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return "asyncio"
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
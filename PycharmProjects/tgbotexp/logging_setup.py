@@ -0,0 +1,221 @@
+import sys
+import copy
+import time
+import json
+import queue
+import random
+import secrets
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject
+
+# Контекст текущего обновления: trace_id, чат, пользователь, состояние FSM...
+log_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("log_context", default=None)
+
+CONTEXT_FIELDS = ("trace_id", "tenant", "bot_id", "update_id", "chat_id", "user_id", "state")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+
+
+class ContextFilter(logging.Filter):
+    """
+    Добавляет к записи поля из контекста обновления и применяет сэмплирование.
+
+    Работает в потоке event loop'а (иначе контекст недоступен), поэтому делает
+    минимум: копирует ссылки на поля и решает, пропускать ли запись.
+    """
+
+    def __init__(self, level: int = logging.INFO, debug_sample_rate: float = 0.0, event_sample_rate: float = 1.0):
+        super().__init__()
+        self.level = level
+        self.debug_sample_rate = debug_sample_rate
+        self.event_sample_rate = event_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = log_context.get()
+
+        # Записи ниже основного уровня пишем только для попавших в выборку обновлений
+        if record.levelno < self.level:
+            sampled = context["sampled"] if context else random.random() < self.debug_sample_rate
+            if not sampled:
+                return False
+        elif record.levelno == logging.INFO and record.name == "aiogram.event":
+            if self.event_sample_rate < 1 and random.random() >= self.event_sample_rate:
+                return False
+
+        if context:
+            for field in CONTEXT_FIELDS:
+                setattr(record, field, context.get(field))
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Кладет запись в очередь без форматирования.
+
+    В отличие от стандартного QueueHandler не форматирует запись в потоке
+    event loop'а (traceback и JSON собираются в фоновом потоке), а при
+    переполнении очереди отбрасывает запись вместо ожидания.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Аргументы могут измениться к моменту записи - подставляем их сразу
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(
+    level: str = "INFO",
+    fmt: str = "json",
+    log_file: Optional[str] = None,
+    queue_size: int = 10000,
+    debug_sample_rate: float = 0.0,
+    event_sample_rate: float = 1.0,
+):
+    """
+    Настраивает логирование через очередь: event loop только кладет запись
+    в очередь, форматирование и запись на диск делает фоновый поток.
+    """
+    global _listener, _queue_handler
+
+    if log_file:
+        output = logging.FileHandler(log_file, encoding="utf-8")
+    else:
+        output = logging.StreamHandler(sys.stderr)
+
+    if fmt == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    level = logging.getLevelName(level.upper())
+    queue_handler.addFilter(ContextFilter(level, debug_sample_rate, event_sample_rate))
+
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(queue_handler)
+    # При сэмплировании DEBUG-записи должны создаваться, отбрасывает их фильтр
+    root.setLevel(logging.DEBUG if debug_sample_rate > 0 else level)
+
+    _queue_handler = queue_handler
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Дописывает оставшиеся в очереди записи и останавливает фоновый поток."""
+    global _listener
+
+    if _listener is not None:
+        if _queue_handler is not None and _queue_handler.dropped:
+            logging.getLogger(__name__).warning(
+                f"Очередь логов переполнялась, отброшено записей: {_queue_handler.dropped}"
+            )
+        _listener.stop()
+        _listener = None
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """
+    Заводит trace_id для каждого обновления и кладет в контекст логов
+    чат, пользователя, точку и текущее состояние заказа.
+    """
+
+    def __init__(self, debug_sample_rate: float = 0.0):
+        self.debug_sample_rate = debug_sample_rate
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        tenant = data.get("tenant")
+        state = data.get("state")
+
+        context = {
+            "trace_id": secrets.token_hex(8),
+            "tenant": tenant.name if tenant else None,
+            "bot_id": data["bot"].id,
+            "update_id": getattr(event, "update_id", None),
+            "chat_id": chat.id if chat else None,
+            "user_id": user.id if user else None,
+            "state": await state.get_state() if state else None,
+            "sampled": random.random() < self.debug_sample_rate,
+        }
+        token = log_context.set(context)
+        try:
+            return await handler(event, data)
+        finally:
+            log_context.reset(token)
+
+
+class BotApiLoggingMiddleware(BaseRequestMiddleware):
+    """
+    Логирует вызовы Bot API с длительностью: успешные в DEBUG, ошибки в WARNING.
+    Вызовы из хендлеров получают контекст обновления (trace_id, чат...).
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("bot_api")
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        started = time.perf_counter()
+        try:
+            response = await make_request(bot, method)
+        except Exception as e:
+            duration = (time.perf_counter() - started) * 1000
+            self.logger.warning(f"{type(method).__name__} -> {type(e).__name__}: {e} ({duration:.0f} мс)")
+            raise
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            duration = (time.perf_counter() - started) * 1000
+            self.logger.debug(f"{type(method).__name__} -> {duration:.0f} мс")
+        return response
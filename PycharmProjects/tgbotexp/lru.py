@@ -0,0 +1,43 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, Optional
+
+
+class LRUCache:
+    """
+    Словарь фиксированного размера: при переполнении вытесняется запись,
+    к которой дольше всего не обращались.
+    """
+
+    def __init__(self, maxsize: int):
+        if maxsize <= 0:
+            raise ValueError("maxsize должен быть больше 0")
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._data)
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        return self._data.pop(key, default)
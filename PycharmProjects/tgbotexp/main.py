@@ -1,48 +1,123 @@
 import os
+import html
+import uuid
 import logging
-from datetime import datetime
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 import asyncio
 
 load_dotenv()
 
-from aiogram import Bot, Dispatcher, types, F
-from aiogram.filters import Command
+from aiogram import Bot, Dispatcher, types
+from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import ReplyKeyboardRemove, LabeledPrice, BotCommand
 from aiogram.utils.keyboard import ReplyKeyboardBuilder
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
 
-# Инициализация логгера
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+from fastmode import install_event_loop_policy, json_codec
+from broadcast import OrderBroadcast, RateLimiter
+from customers import CustomerProfiles
+from profiler import LoopProfiler, ProfilerMiddleware, ProfilerRequestMiddleware
+from orders import OrderJournal
+from backpressure import PRIORITY_IN_PROGRESS, PRIORITY_NEW, PRIORITY_PAYMENT
+from logging_setup import BotApiLoggingMiddleware, LogContextMiddleware, setup_logging, shutdown_logging
+from polling import GracefulPolling
+from tenants import Tenant, TenantMiddleware, load_tenants
+from throttling import COMMAND, MEDIA, TEXT, ThrottlingMiddleware, parse_limit
+
+# Инициализация логгера: запись идет через очередь в фоновом потоке
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0'))
+setup_logging(
+    level=os.getenv('LOG_LEVEL', 'INFO'),
+    fmt=os.getenv('LOG_FORMAT', 'json'),
+    log_file=os.getenv('LOG_FILE') or None,
+    queue_size=int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+    debug_sample_rate=LOG_DEBUG_SAMPLE_RATE,
+    event_sample_rate=float(os.getenv('LOG_EVENT_SAMPLE_RATE', '1')),
 )
 logger = logging.getLogger(__name__)
 
-# Получение токенов
-API_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
-ADMIN_CHAT_ID = os.getenv('ADMIN_CHAT_ID')
-PAYMENT_TOKEN = os.getenv('PAYMENT_TOKEN')
+# Токены ботов, чаты админов и платежные токены задаются по точкам (см. tenants.py)
 DEVELOPER_MODE = os.getenv('DEVELOPER_MODE', 'False').lower() == 'true'
 
-if not API_TOKEN:
-    raise ValueError("Не найден TELEGRAM_BOT_TOKEN")
-if not ADMIN_CHAT_ID:
-    raise ValueError("Не указан ADMIN_CHAT_ID")
-if not PAYMENT_TOKEN:
-    logger.warning("PAYMENT_TOKEN не указан, оплата будет недоступна")
+# Журнал подтвержденных заказов (по файлу на точку) и скорость рассылок клиентам
+ORDERS_DIR = os.getenv('ORDERS_DIR', 'orders')
+NOTIFY_RATE = float(os.getenv('NOTIFY_RATE', '25'))  # сообщений в секунду, лимит Telegram ~30
+
+order_journal = OrderJournal(ORDERS_DIR)
+
+# Запущенные рассылки: (точка, кампания) -> задача
+notifications: Dict[Tuple[str, str], Tuple[OrderBroadcast, asyncio.Task]] = {}
+# Ограничитель скорости общий для всех рассылок точки
+notify_limiters: Dict[str, RateLimiter] = {}
+
+NOTIFY_TEMPLATES = {
+    "ready": (
+        "🎂 {recipient_name}, ваш торт готов!\n\n"
+        "Заказ на {delivery_date} ждет вас в кофейне-кондитерской <b>«Сливки»</b>.\n"
+        "Спасибо, что выбрали нас! ❤️"
+    ),
+    "baking": (
+        "👩‍🍳 {recipient_name}, мы уже готовим ваш торт к {delivery_date}!\n\n"
+        "Как только он будет готов, мы пришлем сообщение."
+    ),
+}
+
+# Профили постоянных клиентов: последний заказ и контакт для "повторить заказ"
+customer_profiles = CustomerProfiles(
+    path=os.getenv('CUSTOMERS_DB', 'customers.db'),
+    max_cached=int(os.getenv('CUSTOMERS_CACHE_SIZE', '5000')),
+)
 
-try:
-    ADMIN_CHAT_ID = int(ADMIN_CHAT_ID)
-except ValueError:
-    raise ValueError("ADMIN_CHAT_ID должен быть числовым идентификатором")
+# Профилирование по команде /profile из чата админа
+profiler = LoopProfiler(
+    output_dir=os.getenv('PROFILE_DIR', 'profiles'),
+    interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000,
+    block_threshold=float(os.getenv('PROFILE_BLOCK_MS', '100')) / 1000,
+)
+PROFILE_MAX_SECONDS = 300
+profile_tasks = set()
+
+# Быстрый режим: orjson/ujson для разбора ответов Bot API и uvloop, если установлены
+FAST_MODE = os.getenv('FAST_MODE', 'False').lower() == 'true'
+
+# Корректная остановка: сколько ждать начатые обработчики и куда сохранять состояния FSM.
+# Offset в Telegram сдвигается сразу после получения обновлений (иначе один медленный
+# обработчик останавливает прием), поэтому полученные, но не обработанные обновления
+# (до MAX_PENDING_UPDATES + HANDLER_CONCURRENCY) переживают перезапуск только через снимок.
+# Он пишется по SIGTERM/SIGINT до и после ожидания обработчиков; при аварийном
+# завершении без сигнала (SIGKILL, OOM) эти обновления теряются. Если SHUTDOWN_TIMEOUT
+# больше, чем платформа ждет до SIGKILL (docker stop - 10 с), начатые обработчики
+# будут выполнены повторно из первого снимка.
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', '25'))
+STATE_SNAPSHOT_FILE = os.getenv('STATE_SNAPSHOT_FILE', 'fsm_snapshot.json')
+
+# Сколько обновлений обрабатываем одновременно и сколько держим в очереди
+HANDLER_CONCURRENCY = int(os.getenv('HANDLER_CONCURRENCY', '32'))
+MAX_PENDING_UPDATES = int(os.getenv('MAX_PENDING_UPDATES', '200'))
+# Ответ "заняты" на отброшенные обновления: не больше N одновременно и раз в M секунд на чат
+MAX_BUSY_REPLIES = int(os.getenv('MAX_BUSY_REPLIES', '8'))
+BUSY_REPLY_INTERVAL = float(os.getenv('BUSY_REPLY_INTERVAL', '60'))
+
+# Ограничение частоты входящих сообщений: "количество/секунды" на пользователя
+throttling = ThrottlingMiddleware(
+    limits={
+        COMMAND: parse_limit(os.getenv('THROTTLE_COMMAND_LIMIT', '5/10')),
+        TEXT: parse_limit(os.getenv('THROTTLE_TEXT_LIMIT', '10/10')),
+        MEDIA: parse_limit(os.getenv('THROTTLE_MEDIA_LIMIT', '3/10')),
+    },
+    max_buckets=int(os.getenv('THROTTLE_MAX_USERS', '10000')),
+    warn=os.getenv('THROTTLE_WARN', 'true').lower() == 'true',
+)
 
-# Инициализация бота
-bot = Bot(token=API_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+# Один диспетчер и одно хранилище на все точки.
+# Ключи FSM содержат bot_id, поэтому состояния разных точек не пересекаются.
 storage = MemoryStorage()
 dp = Dispatcher(storage=storage)
 
@@ -90,6 +165,9 @@ CAKE_TYPES = {
     "🎂 Бенто-торт (400-450г)": "bento"
 }
 
+REPEAT_ORDER_BUTTON = "🔁 Повторить прошлый заказ"
+COOKIE_PRICE = 160
+
 DECOR_OPTIONS_REGULAR = {
     "🎨 Рисунок цветной (от 500р)": 500,
     "✏️ Рисунок схематический (от 500р)": 500,
@@ -103,6 +181,14 @@ DECOR_OPTIONS_BENTO = {
     "❌ Без оформления": 0
 }
 
+# Каталог по умолчанию - используется точками, у которых не задан свой
+DEFAULT_CATALOG = {
+    "flavors_regular": FLAVORS_REGULAR,
+    "flavors_bento": FLAVORS_BENTO,
+    "decor_regular": DECOR_OPTIONS_REGULAR,
+    "decor_bento": DECOR_OPTIONS_BENTO,
+}
+
 
 class CakeOrder(StatesGroup):
     choosing_cake_type = State()
@@ -122,6 +208,25 @@ class CakeOrder(StatesGroup):
     payment_confirmation = State()
 
 
+def update_priority(update: types.Update, state) -> int:
+    # Оплата и заказы в процессе оформления важнее новых /start и /prices
+    if update.pre_checkout_query or (update.message and update.message.successful_payment):
+        return PRIORITY_PAYMENT
+    if state in (CakeOrder.payment_method.state, CakeOrder.payment_confirmation.state):
+        return PRIORITY_PAYMENT
+    if state is not None:
+        return PRIORITY_IN_PROGRESS
+    return PRIORITY_NEW
+
+
+async def reply_busy(bot: Bot, update: types.Update):
+    if update.message:
+        await bot.send_message(
+            chat_id=update.message.chat.id,
+            text="⏳ Сейчас очень много заказов. Пожалуйста, повторите через минуту."
+        )
+
+
 async def set_commands(bot: Bot):
     commands = [
         BotCommand(command="start", description="Начать работу с ботом"),
@@ -140,23 +245,23 @@ async def set_commands(bot: Bot):
     await bot.set_my_commands(commands)
 
 
-async def send_admin_notification(text: str, photo=None):
+async def send_admin_notification(bot: Bot, tenant: Tenant, text: str, photo=None):
     try:
         if photo:
             await bot.send_photo(
-                chat_id=ADMIN_CHAT_ID,
+                chat_id=tenant.admin_chat_id,
                 photo=photo,
                 caption=text,
                 parse_mode=ParseMode.HTML
             )
         else:
             await bot.send_message(
-                chat_id=ADMIN_CHAT_ID,
+                chat_id=tenant.admin_chat_id,
                 text=text,
                 parse_mode=ParseMode.HTML
             )
     except Exception as e:
-        logger.error(f"Ошибка отправки уведомления: {e}")
+        logger.error(f"[{tenant.name}] Ошибка отправки уведомления: {e}")
 
 
 @dp.message(Command("start"))
@@ -191,9 +296,9 @@ async def cmd_start(message: types.Message):
 
 
 @dp.message(Command("prices"))
-async def cmd_prices(message: types.Message):
-    regular_prices = "\n".join([f"{flavor} - {price}₽/кг" for flavor, price in FLAVORS_REGULAR.items()])
-    bento_prices = "\n".join([f"{flavor} - {price}₽" for flavor, price in FLAVORS_BENTO.items()])
+async def cmd_prices(message: types.Message, tenant: Tenant):
+    regular_prices = "\n".join([f"{flavor} - {price}₽/кг" for flavor, price in tenant.flavors_regular.items()])
+    bento_prices = "\n".join([f"{flavor} - {price}₽" for flavor, price in tenant.flavors_bento.items()])
 
     prices_text = (
         "🎂 <b>Расценки на торты</b>\n\n"
@@ -233,7 +338,205 @@ async def cmd_help(message: types.Message):
     await message.answer(help_text, parse_mode=ParseMode.HTML)
 
 
-@dp.message(F.text == "Отменить заказ ❌")
+async def is_admin_chat(message: types.Message, tenant: Tenant) -> bool:
+    return message.chat.id == tenant.admin_chat_id
+
+
+@dp.message(Command("stats"), is_admin_chat)
+async def cmd_stats(message: types.Message, polling: Optional[GracefulPolling] = None):
+    stats = throttling.stats()
+    throttled = stats["throttled"]
+    text = (
+        "📊 <b>Ограничение частоты сообщений</b>\n\n"
+        f"Отброшено команд: {throttled.get(COMMAND, 0)}\n"
+        f"Отброшено текстов: {throttled.get(TEXT, 0)}\n"
+        f"Отброшено медиа: {throttled.get(MEDIA, 0)}\n"
+        f"Ограниченных пользователей: {stats['throttled_users']}\n"
+        f"Отслеживается корзин: {stats['tracked_buckets']} (вытеснено {stats['evicted_buckets']})"
+    )
+
+    if polling is not None:
+        queue_stats = polling.stats()
+        text += (
+            "\n\n📥 <b>Очередь обновлений</b>\n\n"
+            f"В работе: {queue_stats['active']} из {queue_stats['concurrency']}\n"
+            f"В очереди: {queue_stats['depth']} из {queue_stats['max_depth']}\n"
+            f"Отклонено (\"заняты\"): {queue_stats['shed']}, "
+            f"из них без ответа: {queue_stats['busy_suppressed']}\n"
+            f"Ожидание в очереди: ср. {queue_stats['wait_avg_ms']:.0f} мс, "
+            f"макс. {queue_stats['wait_max_ms']:.0f} мс"
+        )
+
+    profiles_stats = customer_profiles.stats()
+    text += (
+        "\n\n👥 <b>Профили клиентов</b>\n\n"
+        f"В памяти: {profiles_stats['cached']} (вытеснено {profiles_stats['evicted']})"
+    )
+
+    await message.answer(text, parse_mode=ParseMode.HTML)
+
+
+def parse_delivery_date(value: Optional[str]) -> Optional[date]:
+    """Дата из ДД.ММ.ГГГГ; принимает и запись без ведущих нулей, как в старых заказах."""
+    try:
+        return datetime.strptime(value, "%d.%m.%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def render_notification(status: str, order: dict) -> str:
+    return NOTIFY_TEMPLATES[status].format(
+        recipient_name=html.escape(order.get('recipient_name') or "Здравствуйте"),
+        delivery_date=order.get('delivery_date', ''),
+    )
+
+
+async def run_notification(bot: Bot, tenant: Tenant, campaign: OrderBroadcast):
+    try:
+        result = await campaign.run()
+    except asyncio.CancelledError:
+        logger.warning(f"[{tenant.name}] Рассылка {campaign.campaign_id} прервана, продолжится при повторном запуске")
+        raise
+    except Exception as e:
+        logger.exception(f"[{tenant.name}] Ошибка рассылки {campaign.campaign_id}: {e}")
+        await send_admin_notification(bot, tenant, f"⚠️ Рассылка {campaign.campaign_id} остановлена с ошибкой: {e}")
+        return
+    finally:
+        notifications.pop((tenant.name, campaign.campaign_id), None)
+
+    text = (
+        f"📨 Рассылка <b>{campaign.campaign_id}</b> завершена\n\n"
+        f"✅ Доставлено: {result['delivered']}\n"
+        f"❌ Не доставлено: {result['failed']}"
+    )
+    if (result['total_delivered'], result['total_failed']) != (result['delivered'], result['failed']):
+        text += (
+            f"\n\nВсего с первого запуска: доставлено {result['total_delivered']}, "
+            f"не доставлено {result['total_failed']}"
+        )
+    await send_admin_notification(bot, tenant, text)
+
+
+@dp.message(Command("notify"), is_admin_chat)
+async def cmd_notify(message: types.Message, bot: Bot, tenant: Tenant):
+    args = (message.text or "").split()[1:]
+    usage = (
+        "Использование: /notify ДД.ММ.ГГГГ [статус]\n"
+        f"Статусы: {', '.join(NOTIFY_TEMPLATES)} (по умолчанию ready)"
+    )
+    if not args:
+        await message.answer(usage)
+        return
+
+    target_date = parse_delivery_date(args[0])
+    status = args[1] if len(args) > 1 else "ready"
+    if target_date is None or status not in NOTIFY_TEMPLATES:
+        await message.answer(usage)
+        return
+
+    # Одна кампания на дату, как бы ее ни записал админ
+    campaign_id = f"{target_date:%d.%m.%Y}-{status}"
+    running = notifications.get((tenant.name, campaign_id))
+    if running:
+        stats = running[0].stats()
+        await message.answer(
+            f"Рассылка {campaign_id} уже идет: доставлено {stats['delivered']}, ошибок {stats['failed']}"
+        )
+        return
+
+    campaign = OrderBroadcast(
+        bot=bot,
+        journal=order_journal,
+        tenant_name=tenant.name,
+        campaign_id=campaign_id,
+        select=lambda order: parse_delivery_date(order.get('delivery_date')) == target_date,
+        render=lambda order: render_notification(status, order),
+        limiter=notify_limiters.setdefault(tenant.name, RateLimiter(NOTIFY_RATE)),
+    )
+    task = asyncio.create_task(run_notification(bot, tenant, campaign))
+    notifications[(tenant.name, campaign_id)] = (campaign, task)
+    await message.answer(f"📨 Рассылка {campaign_id} запущена. По завершении пришлю отчет.")
+
+
+@dp.message(Command("profile"), is_admin_chat)
+async def cmd_profile(message: types.Message):
+    usage = (
+        "Использование: /profile [секунды] или /profile [N]u\n"
+        "Например: /profile 30 - профилировать 30 секунд, "
+        f"/profile 500u - следующие 500 обновлений (не дольше {PROFILE_MAX_SECONDS} с)"
+    )
+    args = (message.text or "").split()[1:]
+    seconds, updates = 30.0, None
+    try:
+        if args and args[0].endswith("u"):
+            updates = int(args[0][:-1])
+            seconds = PROFILE_MAX_SECONDS
+        elif args:
+            seconds = float(args[0])
+        if seconds <= 0 or seconds > PROFILE_MAX_SECONDS or (updates is not None and updates <= 0):
+            raise ValueError
+    except ValueError:
+        await message.answer(usage)
+        return
+
+    if profiler.active:
+        await message.answer("Профилирование уже запущено")
+        return
+
+    target = f"{updates} обновлений" if updates else f"{seconds:.0f} с"
+    await message.answer(f"🔬 Профилирование запущено ({target})")
+    # Профилируем в фоне, чтобы не занимать обработчик обновлений на всё время замера
+    task = asyncio.create_task(run_profile(message, seconds, updates))
+    profile_tasks.add(task)
+    task.add_done_callback(profile_tasks.discard)
+
+
+async def run_profile(message: types.Message, seconds: float, updates: Optional[int]):
+    try:
+        result = await profiler.profile(seconds, updates)
+    except Exception as e:
+        logger.exception(f"Ошибка профилирования: {e}")
+        await message.answer(f"⚠️ Ошибка профилирования: {e}")
+        return
+
+    await message.answer(
+        "🔬 <b>Профиль event loop'а</b>\n\n" + profiler.summary(result),
+        parse_mode=ParseMode.HTML
+    )
+
+
+@dp.shutdown()
+async def stop_background_tasks():
+    # Прогресс рассылок сохраняется после каждого сообщения - их можно продолжить той же командой
+    tasks = [task for _, task in notifications.values()] + list(profile_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@dp.shutdown()
+async def close_customer_profiles():
+    await asyncio.to_thread(customer_profiles.close)
+
+
+# Фильтры - корутины: синхронные фильтры, включая F.*, aiogram выполняет через asyncio.to_thread
+async def is_cancel_button(message: types.Message) -> bool:
+    return message.text == "Отменить заказ ❌"
+
+
+async def has_photo(message: types.Message) -> bool:
+    return bool(message.photo)
+
+
+async def has_contact(message: types.Message) -> bool:
+    return message.contact is not None
+
+
+async def is_successful_payment(message: types.Message) -> bool:
+    return message.successful_payment is not None
+
+
+@dp.message(is_cancel_button)
 @dp.message(Command("cancel"))
 async def cancel_order(message: types.Message, state: FSMContext):
     await state.clear()
@@ -243,8 +546,52 @@ async def cancel_order(message: types.Message, state: FSMContext):
     )
 
 
+def requote_last_order(profile: dict, tenant: Tenant) -> Optional[dict]:
+    """Собирает черновик прошлого заказа по текущим ценам точки (None - если позиции убрали из меню)."""
+    cake_type = profile.get('cake_type')
+    if cake_type == "bento":
+        flavors, decor_options = tenant.flavors_bento, tenant.decor_bento
+    else:
+        flavors, decor_options = tenant.flavors_regular, tenant.decor_regular
+
+    flavor = profile.get('flavor')
+    decor_option = profile.get('decor_option')
+    if flavor not in flavors or decor_option not in decor_options:
+        return None
+    if cake_type != "bento" and profile.get('size') not in SIZES:
+        return None
+
+    cookies_count = profile.get('cookies_count', 0)
+    draft = {
+        "cake_type": cake_type,
+        "flavor": flavor,
+        "price": flavors[flavor],
+        "decor_option": decor_option,
+        "decor_price": decor_options[decor_option],
+        "cookies_count": cookies_count,
+        "cookies_price": COOKIE_PRICE * cookies_count,
+        "cookies_photo": None,
+        "recipient_name": profile.get('recipient_name'),
+        "user_contact": profile.get('user_contact'),
+    }
+
+    if cake_type == "bento":
+        cream_color = profile.get('cream_color', 'белый')
+        cream_price = 100 if cream_color.strip().lower() != "белый" else 0
+        draft.update(cream_color=cream_color, cream_price=cream_price)
+        base_price = flavors[flavor]
+    else:
+        draft.update(size=profile['size'])
+        base_price = flavors[flavor] * SIZES[profile['size']]
+
+    draft['total_price'] = int(
+        base_price + draft['decor_price'] + draft.get('cream_price', 0) + draft['cookies_price']
+    )
+    return draft
+
+
 @dp.message(Command("order"))
-async def start_order(message: types.Message, state: FSMContext):
+async def start_order(message: types.Message, state: FSMContext, tenant: Tenant):
     disclaimer = (
         "⚠️ <b>Перед оформлением заказа:</b>\n\n"
         "Мы уважаем труд наших кондитеров!\n\n"
@@ -256,7 +603,17 @@ async def start_order(message: types.Message, state: FSMContext):
 
     await message.answer(disclaimer, parse_mode=ParseMode.HTML)
 
+    # Постоянным клиентам предлагаем повторить заказ, а имя и контакт - одной кнопкой на своих шагах
+    profile = await customer_profiles.get(tenant.name, message.from_user.id)
+    await state.update_data(
+        repeat_order=False,
+        saved_recipient=profile.get('recipient_name') if profile else None,
+        saved_contact=profile.get('user_contact') if profile else None,
+    )
+
     builder = ReplyKeyboardBuilder()
+    if profile:
+        builder.button(text=REPEAT_ORDER_BUTTON)
     for cake_type in CAKE_TYPES.keys():
         builder.button(text=cake_type)
     builder.button(text="Отменить заказ ❌")
@@ -269,19 +626,23 @@ async def start_order(message: types.Message, state: FSMContext):
     )
 
 
-@dp.message(CakeOrder.choosing_cake_type)
-async def process_cake_type(message: types.Message, state: FSMContext):
+@dp.message(StateFilter(CakeOrder.choosing_cake_type))
+async def process_cake_type(message: types.Message, state: FSMContext, tenant: Tenant):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
         return
 
+    if message.text == REPEAT_ORDER_BUTTON:
+        await repeat_last_order(message, state, tenant)
+        return
+
     if message.text not in CAKE_TYPES:
         await message.answer("Пожалуйста, выберите тип торта из предложенных")
         return
 
     cake_type = CAKE_TYPES[message.text]
     await state.update_data(cake_type=cake_type)
-    flavors = FLAVORS_BENTO if cake_type == "bento" else FLAVORS_REGULAR
+    flavors = tenant.flavors_bento if cake_type == "bento" else tenant.flavors_regular
 
     builder = ReplyKeyboardBuilder()
     for flavor in flavors.keys():
@@ -296,14 +657,50 @@ async def process_cake_type(message: types.Message, state: FSMContext):
     )
 
 
-@dp.message(CakeOrder.choosing_flavor)
-async def process_flavor(message: types.Message, state: FSMContext):
+async def repeat_last_order(message: types.Message, state: FSMContext, tenant: Tenant):
+    profile = await customer_profiles.get(tenant.name, message.from_user.id)
+    draft = requote_last_order(profile, tenant) if profile else None
+    if draft is None:
+        await message.answer("😔 Позиций из прошлого заказа уже нет в меню. Пожалуйста, выберите тип торта")
+        return
+
+    await state.update_data(**draft, repeat_order=True)
+
+    summary = "🔁 <b>Повторяем прошлый заказ</b> по текущим ценам:\n\n"
+    if draft['cake_type'] == "bento":
+        summary += (
+            f"🎂 Тип: Бенто-торт (400-450г)\n"
+            f"🍰 Вкус: {draft['flavor']}\n"
+            f"🎨 Цвет крема: {html.escape(draft['cream_color'])}\n"
+        )
+    else:
+        summary += (
+            f"🎂 Тип: Обычный торт\n"
+            f"🍰 Вкус: {draft['flavor']}\n"
+            f"📏 Размер: {draft['size']}\n"
+        )
+    summary += f"✨ Оформление: {draft['decor_option']}\n"
+    if draft['cookies_count'] > 0:
+        summary += f"🍪 Пряники: {draft['cookies_count']} шт.\n"
+    summary += (
+        f"👑 Получатель: {html.escape(draft['recipient_name'] or 'не указано')}\n"
+        f"📱 Тел: {html.escape(draft['user_contact'] or 'не указан')}\n"
+        f"💵 Сумма: ≈ {draft['total_price']}₽\n\n"
+        "📅 На какую дату нужен торт? (Укажите в формате ДД.ММ.ГГГГ)"
+    )
+
+    await state.set_state(CakeOrder.delivery_date)
+    await message.answer(summary, parse_mode=ParseMode.HTML, reply_markup=ReplyKeyboardRemove())
+
+
+@dp.message(StateFilter(CakeOrder.choosing_flavor))
+async def process_flavor(message: types.Message, state: FSMContext, tenant: Tenant):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
         return
 
     data = await state.get_data()
-    flavors = FLAVORS_BENTO if data.get('cake_type') == "bento" else FLAVORS_REGULAR
+    flavors = tenant.flavors_bento if data.get('cake_type') == "bento" else tenant.flavors_regular
 
     if message.text not in flavors:
         await message.answer("Пожалуйста, выберите вкус из предложенных")
@@ -332,8 +729,8 @@ async def process_flavor(message: types.Message, state: FSMContext):
         )
 
 
-@dp.message(CakeOrder.choosing_cream_color)
-async def process_cream_color(message: types.Message, state: FSMContext):
+@dp.message(StateFilter(CakeOrder.choosing_cream_color))
+async def process_cream_color(message: types.Message, state: FSMContext, tenant: Tenant):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
         return
@@ -347,7 +744,7 @@ async def process_cream_color(message: types.Message, state: FSMContext):
     )
 
     builder = ReplyKeyboardBuilder()
-    for decor in DECOR_OPTIONS_BENTO.keys():
+    for decor in tenant.decor_bento.keys():
         builder.button(text=decor)
     builder.button(text="Отменить заказ ❌")
     builder.adjust(1)
@@ -359,8 +756,8 @@ async def process_cream_color(message: types.Message, state: FSMContext):
     )
 
 
-@dp.message(CakeOrder.choosing_size)
-async def process_size(message: types.Message, state: FSMContext):
+@dp.message(StateFilter(CakeOrder.choosing_size))
+async def process_size(message: types.Message, state: FSMContext, tenant: Tenant):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
         return
@@ -374,7 +771,7 @@ async def process_size(message: types.Message, state: FSMContext):
     await state.update_data(size=message.text, total_price=total_price)
 
     builder = ReplyKeyboardBuilder()
-    for decor in DECOR_OPTIONS_REGULAR.keys():
+    for decor in tenant.decor_regular.keys():
         builder.button(text=decor)
     builder.button(text="Отменить заказ ❌")
     builder.adjust(2)
@@ -386,14 +783,14 @@ async def process_size(message: types.Message, state: FSMContext):
     )
 
 
-@dp.message(CakeOrder.choosing_decor)
-async def process_decor(message: types.Message, state: FSMContext):
+@dp.message(StateFilter(CakeOrder.choosing_decor))
+async def process_decor(message: types.Message, state: FSMContext, tenant: Tenant):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
         return
 
     data = await state.get_data()
-    decor_options = DECOR_OPTIONS_BENTO if data.get('cake_type') == "bento" else DECOR_OPTIONS_REGULAR
+    decor_options = tenant.decor_bento if data.get('cake_type') == "bento" else tenant.decor_regular
 
     if message.text not in decor_options:
         await message.answer("Пожалуйста, выберите вариант оформления из предложенных")
@@ -414,7 +811,7 @@ async def process_decor(message: types.Message, state: FSMContext):
     )
 
 
-@dp.message(CakeOrder.choosing_cookies)
+@dp.message(StateFilter(CakeOrder.choosing_cookies))
 async def process_cookies_choice(message: types.Message, state: FSMContext):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
@@ -428,16 +825,12 @@ async def process_cookies_choice(message: types.Message, state: FSMContext):
         )
     elif message.text == "Нет, продолжить без пряников":
         await state.update_data(cookies_count=0, cookies_price=0)
-        await state.set_state(CakeOrder.recipient_name)
-        await message.answer(
-            "✏️ На чье имя оформляем заказ? (ФИО или как обращаться к получателю)",
-            reply_markup=ReplyKeyboardRemove()
-        )
+        await ask_recipient_name(message, state)
     else:
         await message.answer("Пожалуйста, выберите вариант из предложенных")
 
 
-@dp.message(CakeOrder.cookies_count)
+@dp.message(StateFilter(CakeOrder.cookies_count))
 async def process_cookies_count(message: types.Message, state: FSMContext):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
@@ -452,8 +845,7 @@ async def process_cookies_count(message: types.Message, state: FSMContext):
         await message.answer("Пожалуйста, введите число")
         return
 
-    price_per_cookie = 160
-    total_cookies_price = price_per_cookie * count
+    total_cookies_price = COOKIE_PRICE * count
 
     await state.update_data(cookies_count=count, cookies_price=total_cookies_price)
     await state.set_state(CakeOrder.cookies_photo)
@@ -463,18 +855,14 @@ async def process_cookies_count(message: types.Message, state: FSMContext):
     )
 
 
-@dp.message(CakeOrder.cookies_photo, F.photo)
+@dp.message(StateFilter(CakeOrder.cookies_photo), has_photo)
 async def process_cookies_photo(message: types.Message, state: FSMContext):
     photo_id = message.photo[-1].file_id
     await state.update_data(cookies_photo=photo_id)
-    await state.set_state(CakeOrder.recipient_name)
-    await message.answer(
-        "✏️ На чье имя оформляем заказ? (ФИО или как обращаться к получателю)",
-        reply_markup=ReplyKeyboardRemove()
-    )
+    await ask_recipient_name(message, state)
 
 
-@dp.message(CakeOrder.cookies_photo)
+@dp.message(StateFilter(CakeOrder.cookies_photo))
 async def skip_cookies_photo(message: types.Message, state: FSMContext):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
@@ -485,14 +873,29 @@ async def skip_cookies_photo(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(cookies_photo=None)
+    await ask_recipient_name(message, state)
+
+
+async def ask_recipient_name(message: types.Message, state: FSMContext):
+    data = await state.get_data()
+    saved_recipient = data.get('saved_recipient')
+    if saved_recipient:
+        builder = ReplyKeyboardBuilder()
+        builder.button(text=saved_recipient)
+        builder.button(text="Отменить заказ ❌")
+        builder.adjust(1)
+        reply_markup = builder.as_markup(resize_keyboard=True)
+    else:
+        reply_markup = ReplyKeyboardRemove()
+
     await state.set_state(CakeOrder.recipient_name)
     await message.answer(
         "✏️ На чье имя оформляем заказ? (ФИО или как обращаться к получателю)",
-        reply_markup=ReplyKeyboardRemove()
+        reply_markup=reply_markup
     )
 
 
-@dp.message(CakeOrder.recipient_name)
+@dp.message(StateFilter(CakeOrder.recipient_name))
 async def process_recipient_name(message: types.Message, state: FSMContext):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
@@ -511,7 +914,7 @@ async def process_recipient_name(message: types.Message, state: FSMContext):
     )
 
 
-@dp.message(CakeOrder.delivery_date)
+@dp.message(StateFilter(CakeOrder.delivery_date))
 async def process_delivery_date(message: types.Message, state: FSMContext):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
@@ -526,7 +929,16 @@ async def process_delivery_date(message: types.Message, state: FSMContext):
         await message.answer("Пожалуйста, укажите дату в формате ДД.ММ.ГГГГ")
         return
 
-    await state.update_data(delivery_date=message.text)
+    # Храним дату в одном виде (05.03.2030, а не 5.3.2030) - по ней ищутся заказы для /notify
+    await state.update_data(delivery_date=delivery_date.strftime("%d.%m.%Y"))
+
+    data = await state.get_data()
+    if data.get('repeat_order') and data.get('user_contact'):
+        # Повтор заказа: получатель и контакт уже есть - сразу к оплате
+        await state.update_data(order_comment="Повтор прошлого заказа", photo_reference=None)
+        await process_contact(message, state, data['user_contact'])
+        return
+
     await state.set_state(CakeOrder.order_comment)
     await message.answer(
         "💬 Добавьте комментарий к заказу (если нужно):\n\n"
@@ -535,7 +947,7 @@ async def process_delivery_date(message: types.Message, state: FSMContext):
     )
 
 
-@dp.message(CakeOrder.order_comment)
+@dp.message(StateFilter(CakeOrder.order_comment))
 async def process_order_comment(message: types.Message, state: FSMContext):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
@@ -550,14 +962,14 @@ async def process_order_comment(message: types.Message, state: FSMContext):
     )
 
 
-@dp.message(CakeOrder.photo_reference, F.photo)
+@dp.message(StateFilter(CakeOrder.photo_reference), has_photo)
 async def process_photo_reference(message: types.Message, state: FSMContext):
     photo_id = message.photo[-1].file_id
     await state.update_data(photo_reference=photo_id)
     await ask_for_contact(message, state)
 
 
-@dp.message(CakeOrder.photo_reference)
+@dp.message(StateFilter(CakeOrder.photo_reference))
 async def skip_photo_reference(message: types.Message, state: FSMContext):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
@@ -571,31 +983,43 @@ async def skip_photo_reference(message: types.Message, state: FSMContext):
     await ask_for_contact(message, state)
 
 
+def saved_contact_button(contact: str) -> str:
+    return f"✅ Мой номер: {contact}"
+
+
 async def ask_for_contact(message: types.Message, state: FSMContext):
+    keyboard = [
+        [types.KeyboardButton(text="📱 Отправить контакт", request_contact=True)],
+        [types.KeyboardButton(text="Отменить заказ ❌")]
+    ]
+    data = await state.get_data()
+    if data.get('saved_contact'):
+        keyboard.insert(0, [types.KeyboardButton(text=saved_contact_button(data['saved_contact']))])
+
     await state.set_state(CakeOrder.user_contact)
     await message.answer(
         "📱 Укажите ваш номер телефона для связи:",
-        reply_markup=types.ReplyKeyboardMarkup(
-            keyboard=[
-                [types.KeyboardButton(text="📱 Отправить контакт", request_contact=True)],
-                [types.KeyboardButton(text="Отменить заказ ❌")]
-            ],
-            resize_keyboard=True
-        )
+        reply_markup=types.ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
     )
 
 
-@dp.message(CakeOrder.user_contact, F.contact)
+@dp.message(StateFilter(CakeOrder.user_contact), has_contact)
 async def process_contact_from_button(message: types.Message, state: FSMContext):
     await process_contact(message, state, message.contact.phone_number)
 
 
-@dp.message(CakeOrder.user_contact)
+@dp.message(StateFilter(CakeOrder.user_contact))
 async def process_contact_from_text(message: types.Message, state: FSMContext):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
         return
 
+    data = await state.get_data()
+    saved_contact = data.get('saved_contact')
+    if saved_contact and message.text == saved_contact_button(saved_contact):
+        await process_contact(message, state, saved_contact)
+        return
+
     if not message.text or len(message.text) < 5:
         await message.answer("Пожалуйста, укажите корректный номер телефона")
         return
@@ -621,18 +1045,18 @@ async def process_contact(message: types.Message, state: FSMContext, contact_inf
     )
 
 
-@dp.message(CakeOrder.payment_method)
-async def process_payment(message: types.Message, state: FSMContext):
+@dp.message(StateFilter(CakeOrder.payment_method))
+async def process_payment(message: types.Message, state: FSMContext, bot: Bot, tenant: Tenant):
     if message.text == "Отменить заказ ❌":
         await cancel_order(message, state)
         return
 
     if message.text == "🔧 Пропустить оплату (dev)" and DEVELOPER_MODE:
         await state.update_data(payment_confirmation=True)
-        await confirm_order(message, state)
+        await confirm_order(message, state, bot, tenant)
         return
 
-    if not PAYMENT_TOKEN:
+    if not tenant.payment_token:
         await message.answer("⚠️ Онлайн-оплата временно недоступна.")
         return
 
@@ -640,11 +1064,11 @@ async def process_payment(message: types.Message, state: FSMContext):
 
     # Рассчитываем итоговую стоимость
     if data.get('cake_type') == "bento":
-        base_price = FLAVORS_BENTO.get(data.get('flavor', ''), 0)
+        base_price = tenant.flavors_bento.get(data.get('flavor', ''), 0)
     else:
         size = data.get('size', '1 кг')
         size_value = float(size.split()[0])  # Изменили split()[1] на split()[0]
-        base_price = FLAVORS_REGULAR.get(data.get('flavor', ''), 0) * size_value
+        base_price = tenant.flavors_regular.get(data.get('flavor', ''), 0) * size_value
 
     decor_price = data.get('decor_price', 0)
     cream_price = data.get('cream_price', 0)
@@ -663,26 +1087,26 @@ async def process_payment(message: types.Message, state: FSMContext):
             title=f"Предоплата за торт {data.get('flavor', '')}",
             description=f"Размер: {data.get('size', '1 кг')}. Остаток оплачивается при получении.",
             payload="cake_prepayment",
-            provider_token=PAYMENT_TOKEN,
+            provider_token=tenant.payment_token,
             currency="RUB",
             prices=prices,
             need_name=True,
             need_phone_number=True
         )
     except Exception as e:
-        logger.error(f"Ошибка при создании инвойса: {e}")
+        logger.error(f"[{tenant.name}] Ошибка при создании инвойса: {e}")
         await message.answer("Произошла ошибка. Пожалуйста, попробуйте позже.")
 
 
 @dp.pre_checkout_query()
-async def process_pre_checkout_query(pre_checkout_query: types.PreCheckoutQuery):
+async def process_pre_checkout_query(pre_checkout_query: types.PreCheckoutQuery, bot: Bot):
     await bot.answer_pre_checkout_query(pre_checkout_query.id, ok=True)
 
 
-@dp.message(F.successful_payment)
-async def process_successful_payment(message: types.Message, state: FSMContext):
+@dp.message(is_successful_payment)
+async def process_successful_payment(message: types.Message, state: FSMContext, bot: Bot, tenant: Tenant):
     await state.update_data(payment_confirmation=True)
-    await confirm_order(message, state)
+    await confirm_order(message, state, bot, tenant)
 
 
 @dp.message(Command("dev_paytest"))
@@ -704,8 +1128,16 @@ async def dev_payment_test(message: types.Message, state: FSMContext):
     )
 
 
-@dp.message(F.text.endswith("руб") & F.from_user.id.in_({int(ADMIN_CHAT_ID)} if DEVELOPER_MODE else set()))
-async def process_dev_payment_test(message: types.Message):
+async def is_dev_admin(message: types.Message, tenant: Tenant) -> bool:
+    return DEVELOPER_MODE and message.from_user is not None and message.from_user.id == tenant.admin_chat_id
+
+
+async def is_rub_amount(message: types.Message) -> bool:
+    return message.text is not None and message.text.endswith("руб")
+
+
+@dp.message(is_rub_amount, is_dev_admin)
+async def process_dev_payment_test(message: types.Message, bot: Bot, tenant: Tenant):
     try:
         amount = int(message.text.split()[0])
     except:
@@ -720,17 +1152,17 @@ async def process_dev_payment_test(message: types.Message):
             title="Тест оплаты",
             description=f"Тестовая оплата на сумму {amount} руб",
             payload="dev_test_payment",
-            provider_token=PAYMENT_TOKEN,
+            provider_token=tenant.payment_token,
             currency="RUB",
             prices=prices
         )
     except Exception as e:
-        logger.error(f"Ошибка при тесте оплаты: {e}")
+        logger.error(f"[{tenant.name}] Ошибка при тесте оплаты: {e}")
         await message.answer("Ошибка при создании платежа")
 
 
 @dp.message(Command("dev_skip"))
-async def dev_skip_payment(message: types.Message, state: FSMContext):
+async def dev_skip_payment(message: types.Message, state: FSMContext, bot: Bot, tenant: Tenant):
     if not DEVELOPER_MODE:
         await message.answer("Эта команда доступна только в режиме разработчика")
         return
@@ -738,22 +1170,22 @@ async def dev_skip_payment(message: types.Message, state: FSMContext):
     current_state = await state.get_state()
     if current_state == CakeOrder.payment_method:
         await state.update_data(payment_confirmation=True)
-        await confirm_order(message, state)
+        await confirm_order(message, state, bot, tenant)
     else:
         await message.answer("Эта команда работает только на этапе оплаты")
 
 
-async def confirm_order(message: types.Message, state: FSMContext):
+async def confirm_order(message: types.Message, state: FSMContext, bot: Bot, tenant: Tenant):
     data = await state.get_data()
     username = f"@{message.from_user.username}" if message.from_user.username else "не указан"
 
     # Рассчитываем итоговую стоимость
     if data.get('cake_type') == "bento":
-        base_price = FLAVORS_BENTO.get(data.get('flavor', ''), 0)
+        base_price = tenant.flavors_bento.get(data.get('flavor', ''), 0)
     else:
         size = data.get('size', '1 кг')
         size_value = float(size.split()[0])  # Изменили split()[1] на split()[0]
-        base_price = FLAVORS_REGULAR.get(data.get('flavor', ''), 0) * size_value
+        base_price = tenant.flavors_regular.get(data.get('flavor', ''), 0) * size_value
 
     decor_price = data.get('decor_price', 0)
     cream_price = data.get('cream_price', 0)
@@ -798,17 +1230,51 @@ async def confirm_order(message: types.Message, state: FSMContext):
         f"#заказ #{'бенто' if data.get('cake_type') == 'bento' else 'торт'}"
     )
 
+    try:
+        await order_journal.append(tenant.name, {
+            "order_id": uuid.uuid4().hex[:12],
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "chat_id": message.chat.id,
+            "user_id": message.from_user.id,
+            "username": message.from_user.username,
+            "recipient_name": data.get('recipient_name'),
+            "user_contact": data.get('user_contact'),
+            "delivery_date": data.get('delivery_date'),
+            "cake_type": data.get('cake_type'),
+            "flavor": data.get('flavor'),
+            "size": data.get('size'),
+            "total_price": total_price,
+            "paid": bool(data.get('payment_confirmation')),
+        })
+    except Exception as e:
+        logger.error(f"[{tenant.name}] Не удалось записать заказ в журнал: {e}")
+
+    # Профиль для "повторить прошлый заказ": цены не храним, они пересчитываются по текущему меню
+    try:
+        await customer_profiles.save(tenant.name, message.from_user.id, {
+            "cake_type": data.get('cake_type'),
+            "flavor": data.get('flavor'),
+            "size": data.get('size'),
+            "cream_color": data.get('cream_color'),
+            "decor_option": data.get('decor_option'),
+            "cookies_count": data.get('cookies_count'),
+            "recipient_name": data.get('recipient_name'),
+            "user_contact": data.get('user_contact'),
+        })
+    except Exception as e:
+        logger.error(f"[{tenant.name}] Не удалось сохранить профиль клиента: {e}")
+
     # Отправляем фото референса торта, если есть
     photo_id = data.get('photo_reference')
     if photo_id:
-        await send_admin_notification(order_text, photo=photo_id)
+        await send_admin_notification(bot, tenant, order_text, photo=photo_id)
     else:
-        await send_admin_notification(order_text)
+        await send_admin_notification(bot, tenant, order_text)
 
     # Отправляем фото референса пряников отдельно, если есть
     cookies_photo_id = data.get('cookies_photo')
     if cookies_photo_id:
-        await send_admin_notification("📸 Референс для пряников:", photo=cookies_photo_id)
+        await send_admin_notification(bot, tenant, "📸 Референс для пряников:", photo=cookies_photo_id)
 
     confirmation_message = (
         "✅ <b>Ваш заказ принят!</b> Вот детали:\n\n"
@@ -849,10 +1315,68 @@ async def confirm_order(message: types.Message, state: FSMContext):
     await state.clear()
 
 
+def create_session() -> AiohttpSession:
+    if FAST_MODE:
+        codec, json_loads, json_dumps = json_codec()
+        logger.info(f"Быстрый режим: JSON-кодек {codec}")
+        session = AiohttpSession(json_loads=json_loads, json_dumps=json_dumps)
+    else:
+        session = AiohttpSession()
+    session.middleware(BotApiLoggingMiddleware())
+    session.middleware(ProfilerRequestMiddleware(profiler))
+    return session
+
+
+def setup_middlewares(tenants_by_bot_id: dict):
+    dp.update.outer_middleware(TenantMiddleware(tenants_by_bot_id))
+    dp.update.outer_middleware(LogContextMiddleware(LOG_DEBUG_SAMPLE_RATE))
+    dp.update.outer_middleware(ProfilerMiddleware(profiler))
+    dp.message.outer_middleware(throttling)
+
+
 async def main():
-    await set_commands(bot)
-    await dp.start_polling(bot)
+    tenants = load_tenants(DEFAULT_CATALOG)
+
+    # Все боты используют одну HTTP-сессию (один пул соединений на процесс)
+    session = create_session()
+    bots = []
+    tenants_by_bot_id = {}
+    for tenant in tenants:
+        if not tenant.payment_token:
+            logger.warning(f"[{tenant.name}] PAYMENT_TOKEN не указан, оплата будет недоступна")
+        tenant_bot = Bot(
+            token=tenant.token,
+            session=session,
+            default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+        )
+        bots.append(tenant_bot)
+        tenants_by_bot_id[tenant_bot.id] = tenant
+
+    setup_middlewares(tenants_by_bot_id)
+
+    for tenant_bot in bots:
+        await set_commands(tenant_bot)
+
+    logger.info(f"Запуск точек: {', '.join(tenant.name for tenant in tenants)}")
+    polling = GracefulPolling(
+        dp,
+        bots,
+        snapshot_path=STATE_SNAPSHOT_FILE,
+        drain_timeout=SHUTDOWN_TIMEOUT,
+        concurrency=HANDLER_CONCURRENCY,
+        max_pending=MAX_PENDING_UPDATES,
+        priority=update_priority,
+        on_shed=reply_busy,
+        max_busy_replies=MAX_BUSY_REPLIES,
+        busy_reply_interval=BUSY_REPLY_INTERVAL,
+    )
+    await polling.run()
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    if FAST_MODE:
+        logger.info(f"Быстрый режим: event loop {install_event_loop_policy()}")
+    try:
+        asyncio.run(main())
+    finally:
+        shutdown_logging()
\ No newline at end of file
@@ -0,0 +1,49 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Dict, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class OrderJournal:
+    """
+    Журнал подтвержденных заказов: по одному JSON на строку, отдельный файл на точку.
+
+    Файл только дописывается, поэтому его можно читать потоково (не загружая
+    в память целиком), а номер строки служит устойчивой позицией для
+    возобновления рассылок.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path_for(self, tenant_name: str) -> str:
+        return os.path.join(self.directory, f"{tenant_name}.jsonl")
+
+    def _append(self, tenant_name: str, order: Dict[str, Any]):
+        line = json.dumps(order, ensure_ascii=False)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path_for(tenant_name), "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def append(self, tenant_name: str, order: Dict[str, Any]):
+        # Запись на диск - в отдельном потоке, чтобы не блокировать event loop
+        await asyncio.to_thread(self._append, tenant_name, order)
+
+    def iter_orders(self, tenant_name: str, start_line: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Возвращает (номер строки, заказ) начиная с ``start_line``, читая файл построчно."""
+        path = self.path_for(tenant_name)
+        if not os.path.exists(path):
+            return
+
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f):
+                if line_no < start_line:
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError:
+                    # Недописанная строка (например, после аварийного завершения)
+                    logger.warning(f"{path}:{line_no + 1}: повреждена строка журнала, пропускаем")
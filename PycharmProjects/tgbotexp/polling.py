@@ -0,0 +1,471 @@
+import os
+import json
+import time
+import signal
+import asyncio
+import logging
+from contextlib import suppress
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.types import Update
+from aiogram.utils.backoff import Backoff, BackoffConfig
+
+from backpressure import PRIORITY_NEW, QueuedUpdate, UpdateQueue
+from lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+BACKOFF_CONFIG = BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1)
+
+
+class _BotCursor:
+    """
+    Позиция чтения обновлений одного бота.
+
+    ``offset`` сразу сдвигается за последнее полученное обновление: Telegram
+    отдает не больше 100 обновлений начиная с offset, и один медленный
+    обработчик иначе остановил бы прием для всего бота. Незавершенные
+    обновления хранятся в ``pending`` - при остановке они попадают в снимок
+    и заново ставятся в очередь при следующем запуске.
+    """
+
+    def __init__(self, offset: Optional[int] = None):
+        self.offset = offset
+        self.pending: Dict[int, Update] = {}
+
+    def is_known(self, update_id: int) -> bool:
+        # Ответ getUpdates мог быть запрошен со старым offset
+        return self.offset is not None and update_id < self.offset
+
+    def start(self, update: Update):
+        self.pending[update.update_id] = update
+        if self.offset is None or update.update_id >= self.offset:
+            self.offset = update.update_id + 1
+
+    def finish(self, update_id: int):
+        self.pending.pop(update_id, None)
+
+
+class GracefulPolling:
+    """
+    Long polling с корректной остановкой.
+
+    По SIGTERM/SIGINT перестает забирать обновления, ждет завершения
+    начатых хендлеров (не дольше ``drain_timeout`` секунд) и сохраняет
+    на диск состояния FSM вместе с необработанными обновлениями.
+    При следующем запуске снимок восстанавливается, а эти обновления
+    обрабатываются первыми.
+
+    Offset сдвигается сразу после получения обновлений, поэтому
+    необработанные обновления переживают остановку только через снимок.
+    Снимок пишется и до ожидания хендлеров (на случай, если процесс
+    добьют по таймауту), и после него; последняя пачка подтверждается
+    в Telegram только если итоговый снимок записан. При аварийном
+    завершении без сигнала полученные, но не обработанные обновления теряются.
+
+    Обновления обрабатывают ``concurrency`` воркеров из ограниченной очереди
+    с приоритетами (см. backpressure.py). ``priority`` получает обновление и
+    текущее состояние FSM пользователя и возвращает приоритет; если очередь
+    переполнена, для вытесненных обновлений вызывается ``on_shed``.
+
+    Ответов ``on_shed`` одновременно не больше ``max_busy_replies``, и в один
+    чат - не чаще раза в ``busy_reply_interval`` секунд: при флуде остальные
+    отброшенные обновления пропускаются молча, чтобы не упереться в лимиты
+    Telegram на отправку.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bots: List[Bot],
+        snapshot_path: str,
+        drain_timeout: float = 25,
+        polling_timeout: int = 10,
+        concurrency: int = 32,
+        max_pending: int = 200,
+        priority: Optional[Callable[[Update, Optional[str]], int]] = None,
+        on_shed: Optional[Callable[[Bot, Update], Awaitable[Any]]] = None,
+        max_busy_replies: int = 8,
+        busy_reply_interval: float = 60,
+        max_busy_chats: int = 10000,
+    ):
+        self.dispatcher = dispatcher
+        self.bots = bots
+        self.snapshot_path = snapshot_path
+        self.drain_timeout = drain_timeout
+        self.polling_timeout = polling_timeout
+        self.concurrency = concurrency
+        self.priority = priority
+        self.on_shed = on_shed
+        self.max_busy_replies = max_busy_replies
+        self.busy_reply_interval = busy_reply_interval
+
+        self.queue = UpdateQueue(max_pending)
+        self._workers: List[asyncio.Task] = []
+        self._active = 0
+        self.cursors: Dict[int, _BotCursor] = {bot.id: _BotCursor() for bot in bots}
+        self._restored_updates: Dict[int, List[Dict[str, Any]]] = {}
+        self._busy_replies = 0
+        self._busy_suppressed = 0
+        self._busy_replied_at = LRUCache(max_busy_chats)
+        self._tasks: Set[asyncio.Task] = set()
+        self._progress = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._force_stop = asyncio.Event()
+
+    def track(self, task: asyncio.Task) -> asyncio.Task:
+        """Регистрирует фоновую задачу, которую нужно дождаться при остановке."""
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.queue.stats(),
+            "active": self._active,
+            "concurrency": self.concurrency,
+            "busy_suppressed": self._busy_suppressed,
+        }
+
+    def stop(self):
+        if self._stop.is_set():
+            logger.warning("Повторный сигнал остановки - прерываем незавершенные обработчики")
+            self._force_stop.set()
+        self._stop.set()
+
+    # --- Снимок состояния ---
+
+    def _storage(self) -> Optional[MemoryStorage]:
+        storage = self.dispatcher.storage
+        return storage if isinstance(storage, MemoryStorage) else None
+
+    def save_snapshot(self):
+        fsm = []
+        storage = self._storage()
+        if storage is not None:
+            for key, record in storage.storage.items():
+                if record.state is None and not record.data:
+                    continue
+                fsm.append({
+                    "key": {
+                        "bot_id": key.bot_id,
+                        "chat_id": key.chat_id,
+                        "user_id": key.user_id,
+                        "thread_id": key.thread_id,
+                        "business_connection_id": key.business_connection_id,
+                        "destiny": key.destiny,
+                    },
+                    "state": record.state,
+                    "data": record.data,
+                })
+
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": datetime.now().isoformat(),
+            "fsm": fsm,
+            "bots": {
+                str(bot_id): {
+                    "offset": cursor.offset,
+                    "pending": [
+                        cursor.pending[update_id].model_dump(mode="json", exclude_unset=True, by_alias=True)
+                        for update_id in sorted(cursor.pending)
+                    ],
+                }
+                for bot_id, cursor in self.cursors.items()
+            },
+        }
+
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.snapshot_path)
+        pending = sum(len(cursor.pending) for cursor in self.cursors.values())
+        logger.info(
+            f"Снимок состояния сохранен: {len(fsm)} диалогов, {pending} необработанных обновлений "
+            f"-> {self.snapshot_path}"
+        )
+
+    def _try_save_snapshot(self) -> bool:
+        try:
+            self.save_snapshot()
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Не удалось сохранить снимок состояния {self.snapshot_path}: {e}")
+            return False
+        return True
+
+    async def restore_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return
+
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Не удалось прочитать снимок состояния {self.snapshot_path}: {e}")
+            return
+
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            logger.warning(f"Неизвестная версия снимка {snapshot.get('version')}, пропускаем")
+            return
+
+        restored = 0
+        storage = self._storage()
+        if storage is not None:
+            for item in snapshot.get("fsm", []):
+                key = StorageKey(**item["key"])
+                if key.bot_id not in self.cursors:
+                    continue
+                await storage.set_state(key, item.get("state"))
+                await storage.set_data(key, item.get("data") or {})
+                restored += 1
+
+        for bot_id, saved in snapshot.get("bots", {}).items():
+            cursor = self.cursors.get(int(bot_id))
+            if cursor is not None:
+                self.cursors[int(bot_id)] = _BotCursor(saved.get("offset"))
+                self._restored_updates[int(bot_id)] = saved.get("pending", [])
+
+        # Снимок одноразовый: после падения без нового снимка старые состояния неактуальны
+        os.remove(self.snapshot_path)
+        logger.info(f"Восстановлено {restored} диалогов из снимка от {snapshot.get('saved_at')}")
+
+    # --- Обработка обновлений ---
+
+    async def _process_update(self, bot: Bot, update: Update, **kwargs: Any):
+        cursor = self.cursors[bot.id]
+        try:
+            response = await self.dispatcher.feed_update(bot, update, **kwargs)
+            if isinstance(response, TelegramMethod):
+                await self.dispatcher.silent_call_request(bot=bot, result=response)
+        except asyncio.CancelledError:
+            # Обновление остается в pending и попадет в снимок
+            logger.warning(f"Обработка update id={update.update_id} прервана при остановке")
+            raise
+        except Exception as e:
+            logger.exception(f"Ошибка обработки update id={update.update_id} ботом id={bot.id}: {e}")
+            cursor.finish(update.update_id)
+        else:
+            cursor.finish(update.update_id)
+        finally:
+            self._progress.set()
+
+    async def _get_priority(self, bot: Bot, update: Update) -> int:
+        if self.priority is None:
+            return PRIORITY_NEW
+
+        state = None
+        event_context = UserContextMiddleware.resolve_event_context(update)
+        fsm_context = self.dispatcher.fsm.resolve_context(
+            bot=bot,
+            chat_id=event_context.chat_id,
+            user_id=event_context.user_id,
+            thread_id=event_context.thread_id,
+            business_connection_id=event_context.business_connection_id,
+        )
+        if fsm_context is not None:
+            state = await fsm_context.get_state()
+        return self.priority(update, state)
+
+    def _should_reply_busy(self, item: QueuedUpdate) -> bool:
+        if self.on_shed is None or self._busy_replies >= self.max_busy_replies:
+            return False
+
+        chat_id = UserContextMiddleware.resolve_event_context(item.update).chat_id
+        key = (item.bot.id, chat_id)
+        now = time.monotonic()
+        replied_at = self._busy_replied_at.get(key)
+        if replied_at is not None and now - replied_at < self.busy_reply_interval:
+            return False
+        self._busy_replied_at[key] = now
+        return True
+
+    async def _shed(self, item: QueuedUpdate):
+        try:
+            await self.on_shed(item.bot, item.update)
+        except Exception as e:
+            logger.warning(f"Не удалось ответить на отброшенное update id={item.update.update_id}: {e}")
+        finally:
+            self._busy_replies -= 1
+
+    async def _worker(self, **kwargs: Any):
+        while True:
+            item = await self.queue.get()
+            self._active += 1
+            try:
+                await self._process_update(item.bot, item.update, **kwargs)
+            finally:
+                self._active -= 1
+
+    async def _enqueue(self, bot: Bot, update: Update):
+        self.cursors[bot.id].start(update)
+        rejected = await self.queue.put(await self._get_priority(bot, update), bot, update)
+        if rejected is None:
+            return
+
+        self.cursors[rejected.bot.id].finish(rejected.update.update_id)
+        if self._should_reply_busy(rejected):
+            logger.warning(
+                f"Очередь переполнена ({len(self.queue)}), "
+                f"отброшено update id={rejected.update.update_id}"
+            )
+            self._busy_replies += 1
+            self.track(asyncio.create_task(self._shed(rejected)))
+        else:
+            self._busy_suppressed += 1
+
+    async def _requeue_restored(self):
+        for bot in self.bots:
+            restored = self._restored_updates.pop(bot.id, [])
+            for raw in restored:
+                try:
+                    update = Update.model_validate(raw, context={"bot": bot})
+                except ValueError as e:
+                    logger.error(f"Не удалось восстановить обновление из снимка (бот id={bot.id}): {e}")
+                    continue
+                await self._enqueue(bot, update)
+            if restored:
+                logger.info(f"Бот id={bot.id}: в очередь возвращено {len(restored)} обновлений из снимка")
+
+    async def _poll(self, bot: Bot, allowed_updates: List[str], **kwargs: Any):
+        cursor = self.cursors[bot.id]
+        backoff = Backoff(config=BACKOFF_CONFIG)
+        request_kwargs = {}
+        if bot.session.timeout:
+            request_kwargs["request_timeout"] = int(bot.session.timeout + self.polling_timeout)
+
+        while True:
+            get_updates = GetUpdates(
+                offset=cursor.offset,
+                timeout=self.polling_timeout,
+                allowed_updates=allowed_updates,
+            )
+            try:
+                updates = await bot(get_updates, **request_kwargs)
+            except Exception as e:
+                logger.error(f"Не удалось получить обновления (бот id={bot.id}): {type(e).__name__}: {e}")
+                await backoff.asleep()
+                continue
+            backoff.reset()
+
+            for update in updates:
+                if not cursor.is_known(update.update_id):
+                    await self._enqueue(bot, update)
+
+    async def _confirm_offsets(self):
+        for bot in self.bots:
+            cursor = self.cursors[bot.id]
+            if cursor.offset is None:
+                continue
+            try:
+                await bot(GetUpdates(offset=cursor.offset, limit=1, timeout=0))
+            except Exception as e:
+                logger.error(f"Не удалось подтвердить обновления (бот id={bot.id}): {e}")
+
+    async def _wait_idle(self):
+        while len(self.queue) or self._active:
+            self._progress.clear()
+            await self._progress.wait()
+        while self._tasks:
+            await asyncio.wait(set(self._tasks))
+
+    async def _drain(self):
+        if len(self.queue) or self._active or self._tasks:
+            logger.info(
+                f"Ожидаем завершения обработчиков: в работе {self._active}, в очереди {len(self.queue)}, "
+                f"фоновых задач {len(self._tasks)} (до {self.drain_timeout} с)"
+            )
+            idle = asyncio.create_task(self._wait_idle())
+            force_stop = asyncio.create_task(self._force_stop.wait())
+            await asyncio.wait({idle, force_stop}, timeout=self.drain_timeout, return_when=asyncio.FIRST_COMPLETED)
+            idle.cancel()
+            force_stop.cancel()
+
+        interrupted = self._active + len(self._tasks)
+        pending = [*self._workers, *self._tasks]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        # Прерванные и не начатые обновления остаются в pending и попадут в снимок
+        not_started = len(self.queue.drain_pending())
+        if interrupted or not_started:
+            logger.warning(f"Не успели обработать: прервано {interrupted}, не начато {not_started}")
+
+    def _install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            with suppress(NotImplementedError):
+                loop.add_signal_handler(sig, self._on_signal, sig)
+
+    def _on_signal(self, sig: signal.Signals):
+        logger.warning(f"Получен сигнал {sig.name}, останавливаемся")
+        self.stop()
+
+    async def run(self, **kwargs: Any):
+        await self.restore_snapshot()
+        self._install_signal_handlers()
+
+        allowed_updates = self.dispatcher.resolve_used_update_types()
+        workflow_data = {
+            "dispatcher": self.dispatcher,
+            "bots": self.bots,
+            "polling": self,
+            **self.dispatcher.workflow_data,
+            **kwargs,
+        }
+
+        await self.dispatcher.emit_startup(bot=self.bots[-1], **workflow_data)
+        pollers = []
+        failed = []
+        try:
+            self._workers = [
+                asyncio.create_task(self._worker(**workflow_data))
+                for _ in range(self.concurrency)
+            ]
+            await self._requeue_restored()
+            for bot in self.bots:
+                user = await bot.me()
+                logger.info(f"Запуск polling для @{user.username} id={bot.id}")
+                pollers.append(asyncio.create_task(self._poll(bot, allowed_updates, **workflow_data)))
+
+            stop = asyncio.create_task(self._stop.wait())
+            done, _ = await asyncio.wait([*pollers, stop], return_when=asyncio.FIRST_COMPLETED)
+            stop.cancel()
+            # Если polling упал с ошибкой - пробрасываем ее после корректной остановки
+            failed = [task for task in done if task is not stop]
+        finally:
+            # 1. Перестаем забирать новые обновления
+            for task in pollers:
+                task.cancel()
+            await asyncio.gather(*pollers, return_exceptions=True)
+
+            # 2. Сразу сохраняем снимок: если процесс добьют во время ожидания,
+            #    необработанные обновления не потеряются (начатые обработаются повторно)
+            self._try_save_snapshot()
+
+            # 3. Дожидаемся обработчиков (и очереди) вместе с их исходящими запросами
+            await self._drain()
+
+            # 4. Итоговый снимок; последнюю пачку подтверждаем, только если он записан
+            if self._try_save_snapshot():
+                await self._confirm_offsets()
+            else:
+                logger.error("Снимок не сохранен - offset не подтверждаем, последняя пачка обновлений придет повторно")
+
+            try:
+                await self.dispatcher.emit_shutdown(bot=self.bots[-1], **workflow_data)
+            finally:
+                # Сессия может быть общей для нескольких ботов - закрываем каждую один раз
+                sessions = {id(bot.session): bot.session for bot in self.bots}
+                await asyncio.gather(*(session.close() for session in sessions.values()))
+            logger.info("Бот остановлен")
+
+        for task in failed:
+            task.result()
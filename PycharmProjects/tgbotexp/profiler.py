@@ -0,0 +1,295 @@
+import os
+import sys
+import html
+import time
+import asyncio
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Виртуальное окружение может лежать внутри проекта (.venv в PyCharm) - его кадры не код бота
+LIBRARY_MARKERS = (os.sep + "site-packages" + os.sep, os.sep + "dist-packages" + os.sep)
+LIBRARY_PREFIXES = tuple(
+    prefix for prefix in {os.path.join(os.path.abspath(path), "") for path in (sys.prefix, sys.base_prefix)}
+    if not PROJECT_DIR.startswith(prefix)
+)
+
+# Куда относить сэмпл по файлу, в котором выполняется код (от вершины стека вниз)
+CATEGORIES = (
+    (os.sep + os.path.join("aiogram", "fsm"), "FSM-хранилище"),
+    (os.sep + os.path.join("aiogram", "filters"), "фильтры"),
+    (os.sep + "magic_filter", "фильтры"),
+    (os.sep + os.path.join("aiogram", "client"), "Bot API (запросы)"),
+    (os.sep + "aiohttp", "Bot API (запросы)"),
+    (os.sep + "pydantic", "pydantic (модели)"),
+    (os.sep + "logging", "логирование"),
+    (os.sep + os.path.join("aiogram", "dispatcher"), "диспетчер aiogram"),
+)
+
+IDLE_FUNCTIONS = {"select", "poll", "run_forever", "run_until_complete"}
+# uvloop ждет I/O в C-коде: вершиной Python-стека остается запуск loop'а в asyncio.run
+IDLE_RUNNER_FUNCTIONS = {"run", "run_until_complete"}
+RUNNERS_FILE = os.path.join("asyncio", "runners.py")
+IDLE = "простой (ожидание I/O)"
+
+
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_project(code) -> bool:
+    filename = code.co_filename
+    # Кадры самого профайлера (пульс loop'а) в отчет не попадают
+    if not filename.startswith(PROJECT_DIR + os.sep) or filename == __file__:
+        return False
+    return not filename.startswith(LIBRARY_PREFIXES) and not any(marker in filename for marker in LIBRARY_MARKERS)
+
+
+def _is_idle(code) -> bool:
+    if code.co_name in IDLE_FUNCTIONS:
+        return True
+    return code.co_name in IDLE_RUNNER_FUNCTIONS and code.co_filename.endswith(RUNNERS_FILE)
+
+
+def _categorize(codes) -> str:
+    """Первый сверху кадр из кода бота или известной библиотеки определяет категорию сэмпла."""
+    if _is_idle(codes[-1]):
+        return IDLE
+    for code in reversed(codes):
+        if _is_project(code):
+            return f"код бота: {code.co_name}"
+        for marker, category in CATEGORIES:
+            if marker in code.co_filename:
+                return category
+    return "прочее"
+
+
+class LoopProfiler:
+    """
+    Сэмплирующий профайлер event loop'а.
+
+    Фоновый поток каждые ``interval`` секунд снимает стек потока event loop'а
+    и копит свернутые стеки (формат flamegraph.pl / speedscope). Параллельно
+    loop раз в ``interval`` отмечается "пульсом": если пульса нет дольше
+    ``block_threshold``, значит loop заблокирован, и стек в этот момент
+    запоминается как виновник блокировки.
+
+    Профилирование включается на время (``seconds``) или на число
+    обновлений (``updates``), смотря что наступит раньше.
+    """
+
+    def __init__(self, output_dir: str, interval: float = 0.005, block_threshold: float = 0.1):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.block_threshold = block_threshold
+
+        self.active = False
+        self.updates_seen = 0
+        self._updates_limit: Optional[int] = None
+        self._done: Optional[asyncio.Event] = None
+        self._reset()
+
+    def _reset(self):
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.project_functions: Counter = Counter()
+        self.samples = 0
+        self.blocks: List[Dict[str, Any]] = []
+        self.api_calls: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+        self.updates_seen = 0
+        self._last_beat = time.monotonic()
+        self._block: Optional[Dict[str, Any]] = None
+
+    # --- Сбор данных ---
+
+    def _beat(self):
+        if not self.active:
+            return
+        self._last_beat = time.monotonic()
+        self._loop.call_later(self.interval, self._beat)
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()
+
+        self.samples += 1
+        self.stacks[";".join(_label(code) for code in codes)] += 1
+        self.categories[_categorize(codes)] += 1
+        # Включительное время: функция считается один раз, даже при рекурсии
+        for label in {_label(code) for code in codes if _is_project(code)}:
+            self.project_functions[label] += 1
+
+        lag = time.monotonic() - self._last_beat
+        if lag > self.block_threshold:
+            if self._block is None:
+                self._block = {"started": self._last_beat, "where": self._culprit(codes)}
+        elif self._block is not None:
+            self._block["duration"] = self._last_beat - self._block["started"]
+            self.blocks.append(self._block)
+            self._block = None
+
+    @staticmethod
+    def _culprit(codes) -> str:
+        # Самый глубокий кадр из кода бота, иначе - вершина стека
+        for code in reversed(codes):
+            if _is_project(code):
+                return _label(code)
+        return _label(codes[-1])
+
+    def _sampler(self):
+        while self.active:
+            self._sample()
+            time.sleep(self.interval)
+
+    def count_update(self):
+        self.updates_seen += 1
+        if self._updates_limit is not None and self.updates_seen >= self._updates_limit:
+            self._done.set()
+
+    def record_api_call(self, method: str, duration: float):
+        stats = self.api_calls[method]
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] = max(stats[2], duration)
+
+    # --- Запуск ---
+
+    async def profile(self, seconds: float, updates: Optional[int] = None) -> Dict[str, Any]:
+        if self.active:
+            raise RuntimeError("Профилирование уже запущено")
+
+        self._reset()
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._updates_limit = updates
+        self._done = asyncio.Event()
+
+        started = time.monotonic()
+        self.active = True
+        self._loop.call_soon(self._beat)
+        sampler = threading.Thread(target=self._sampler, name="loop-profiler", daemon=True)
+        sampler.start()
+        try:
+            try:
+                await asyncio.wait_for(self._done.wait(), timeout=seconds)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            self.active = False
+            await asyncio.to_thread(sampler.join)
+
+        if self._block is not None:
+            # Блокировка продолжалась до конца профилирования
+            self._block["duration"] = time.monotonic() - self._block["started"]
+            self.blocks.append(self._block)
+            self._block = None
+
+        elapsed = time.monotonic() - started
+        path = await asyncio.to_thread(self._write_folded)
+        return {"elapsed": elapsed, "path": path}
+
+    def _write_folded(self) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile-{datetime.now():%Y%m%d-%H%M%S}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    # --- Отчет ---
+
+    def summary(self, result: Dict[str, Any], top: int = 8) -> str:
+        if not self.samples:
+            return "Нет данных: за время профилирования не снято ни одного сэмпла"
+
+        lines = [
+            f"⏱ Длительность: {result['elapsed']:.1f} с, обновлений: {self.updates_seen}, "
+            f"сэмплов: {self.samples}",
+            "",
+            "<b>Время event loop'а:</b>",
+        ]
+        for name, count in self.categories.most_common(top):
+            lines.append(f"• {html.escape(name)}: {count * 100 / self.samples:.1f}%")
+
+        # Сам профайлер и точка входа есть в каждом стеке - их не показываем
+        functions = [
+            (frame, count) for frame, count in self.project_functions.most_common()
+            if not frame.startswith(("<module>", "main (main.py", "run (polling.py", "_worker ("))
+        ]
+        if functions:
+            lines += ["", "<b>Функции бота (включая вложенные вызовы):</b>"]
+            for frame, count in functions[:top]:
+                lines.append(f"• <code>{frame}</code>: {count * 100 / self.samples:.1f}%")
+
+        if self.api_calls:
+            lines += ["", "<b>Ожидание Bot API:</b>"]
+            by_total = sorted(self.api_calls.items(), key=lambda item: item[1][1], reverse=True)
+            for method, (count, total, longest) in by_total[:top]:
+                lines.append(
+                    f"• {method}: {count} выз., ср. {total / count * 1000:.0f} мс, макс. {longest * 1000:.0f} мс"
+                )
+
+        if self.blocks:
+            lines += ["", f"<b>Блокировки loop'а &gt; {self.block_threshold * 1000:.0f} мс:</b> {len(self.blocks)}"]
+            for block in sorted(self.blocks, key=lambda item: item["duration"], reverse=True)[:top]:
+                lines.append(f"• {block['duration'] * 1000:.0f} мс в <code>{block['where']}</code>")
+
+        lines += ["", f"Профиль: <code>{result['path']}</code>"]
+        return "\n".join(lines)
+
+
+class ProfilerMiddleware(BaseMiddleware):
+    """Считает обновления для профилирования "на N обновлений"."""
+
+    def __init__(self, profiler: LoopProfiler):
+        self.profiler = profiler
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        try:
+            return await handler(event, data)
+        finally:
+            if self.profiler.active:
+                self.profiler.count_update()
+
+
+class ProfilerRequestMiddleware(BaseRequestMiddleware):
+    """Во время профилирования замеряет ожидание ответов Bot API по методам."""
+
+    def __init__(self, profiler: LoopProfiler):
+        self.profiler = profiler
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not self.profiler.active:
+            return await make_request(bot, method)
+
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            self.profiler.record_api_call(type(method).__name__, time.perf_counter() - started)
@@ -0,0 +1,109 @@
+import os
+import re
+import json
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+# Имя точки входит в имена файлов (журнал заказов, прогресс рассылок) и ключи профилей клиентов
+TENANT_NAME_RE = re.compile(r"[A-Za-z0-9_-]+")
+
+
+@dataclass
+class Tenant:
+    name: str
+    token: str
+    admin_chat_id: int
+    payment_token: Optional[str]
+    flavors_regular: Dict[str, int] = field(default_factory=dict)
+    flavors_bento: Dict[str, int] = field(default_factory=dict)
+    decor_regular: Dict[str, int] = field(default_factory=dict)
+    decor_bento: Dict[str, int] = field(default_factory=dict)
+
+
+def _parse_admin_chat_id(value, tenant_name: str) -> int:
+    if value in (None, ""):
+        raise ValueError(f"Не указан ADMIN_CHAT_ID для точки «{tenant_name}»")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"ADMIN_CHAT_ID точки «{tenant_name}» должен быть числовым идентификатором")
+
+
+def load_tenants(catalog: Dict[str, Dict[str, int]]) -> List[Tenant]:
+    """
+    Загружает список точек (франшиз) для запуска в одном процессе.
+
+    Если задан TENANTS_FILE - читаем JSON-список точек, иначе собираем
+    одну точку из TELEGRAM_BOT_TOKEN / ADMIN_CHAT_ID / PAYMENT_TOKEN.
+    Незаданные разделы каталога берутся из ``catalog``.
+    """
+    tenants_file = os.getenv('TENANTS_FILE')
+
+    if not tenants_file:
+        token = os.getenv('TELEGRAM_BOT_TOKEN')
+        if not token:
+            raise ValueError("Не найден TELEGRAM_BOT_TOKEN")
+        raw_tenants = [{
+            "name": "default",
+            "token": token,
+            "admin_chat_id": os.getenv('ADMIN_CHAT_ID'),
+            "payment_token": os.getenv('PAYMENT_TOKEN'),
+        }]
+    else:
+        with open(tenants_file, encoding="utf-8") as f:
+            raw_tenants = json.load(f)
+        if not isinstance(raw_tenants, list) or not raw_tenants:
+            raise ValueError(f"{tenants_file}: ожидается непустой список точек")
+
+    tenants = []
+    seen_tokens = set()
+    seen_names = set()
+    for index, raw in enumerate(raw_tenants):
+        name = raw.get("name") or f"tenant-{index}"
+        if not isinstance(name, str) or not TENANT_NAME_RE.fullmatch(name):
+            raise ValueError(f"Имя точки «{name}» может содержать только латиницу, цифры, «_» и «-»")
+        if name in seen_names:
+            raise ValueError(f"Имя точки «{name}» уже используется другой точкой")
+        seen_names.add(name)
+
+        token = raw.get("token")
+        if not token:
+            raise ValueError(f"Не найден token для точки «{name}»")
+        if token in seen_tokens:
+            raise ValueError(f"Токен точки «{name}» уже используется другой точкой")
+        seen_tokens.add(token)
+
+        tenants.append(Tenant(
+            name=name,
+            token=token,
+            admin_chat_id=_parse_admin_chat_id(raw.get("admin_chat_id"), name),
+            payment_token=raw.get("payment_token") or None,
+            flavors_regular=dict(raw.get("flavors_regular") or catalog["flavors_regular"]),
+            flavors_bento=dict(raw.get("flavors_bento") or catalog["flavors_bento"]),
+            decor_regular=dict(raw.get("decor_regular") or catalog["decor_regular"]),
+            decor_bento=dict(raw.get("decor_bento") or catalog["decor_bento"]),
+        ))
+
+    return tenants
+
+
+class TenantMiddleware(BaseMiddleware):
+    """
+    Подставляет в данные хендлеров точку (``tenant``), которой принадлежит бот.
+    Регистрируется как outer-middleware, чтобы точка была доступна и фильтрам.
+    """
+
+    def __init__(self, tenants_by_bot_id: Dict[int, Tenant]):
+        self.tenants_by_bot_id = tenants_by_bot_id
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        data["tenant"] = self.tenants_by_bot_id[data["bot"].id]
+        return await handler(event, data)
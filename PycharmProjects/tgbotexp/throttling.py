@@ -0,0 +1,127 @@
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message, TelegramObject
+
+from lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+COMMAND = "command"
+TEXT = "text"
+MEDIA = "media"
+
+THROTTLE_WARNING = "⏳ Слишком много сообщений. Подождите немного и повторите."
+
+
+def parse_limit(value: str) -> Tuple[int, float]:
+    """'5/10' -> не больше 5 сообщений за 10 секунд: (burst=5, скорость 0.5 в секунду)."""
+    try:
+        count, seconds = value.split("/")
+        burst, period = int(count), float(seconds)
+        if burst <= 0 or period <= 0:
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"Неверный лимит '{value}', ожидается формат 'количество/секунды'")
+    return burst, burst / period
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "warned")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.warned = False
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Ограничивает частоту входящих сообщений от одного пользователя.
+
+    Для каждого пользователя и типа сообщения (команда, текст, медиа) ведется
+    token bucket. Корзины хранятся в LRU ограниченного размера, поэтому
+    память не растет с числом пользователей. Лишние сообщения отбрасываются
+    до фильтров и хендлеров; при ``warn=True`` пользователь один раз
+    получает предупреждение.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[int, float]],
+        max_buckets: int = 10000,
+        warn: bool = True,
+    ):
+        self.limits = limits
+        self.warn = warn
+        self.buckets = LRUCache(max_buckets)
+        self.throttled = {kind: 0 for kind in limits}
+        # Пользователи, которых хотя бы раз ограничивали (тоже с ограничением по размеру)
+        self.throttled_users = LRUCache(max_buckets)
+
+    @staticmethod
+    def classify(message: Message) -> Optional[str]:
+        # Оплату никогда не ограничиваем
+        if message.successful_payment:
+            return None
+        if message.text is not None:
+            return COMMAND if message.text.startswith("/") else TEXT
+        if message.contact:
+            return TEXT
+        return MEDIA
+
+    def _allow(self, key: Tuple[int, int, str], burst: int, rate: float) -> Tuple[bool, _Bucket]:
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket(burst, now)
+            self.buckets[key] = bucket
+        else:
+            bucket.tokens = min(burst, bucket.tokens + (now - bucket.updated) * rate)
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            bucket.warned = False
+            return True, bucket
+        return False, bucket
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "throttled": dict(self.throttled),
+            "throttled_users": len(self.throttled_users),
+            "tracked_buckets": len(self.buckets),
+            "evicted_buckets": self.buckets.evictions,
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Message) or event.from_user is None:
+            return await handler(event, data)
+
+        kind = self.classify(event)
+        if kind is None or kind not in self.limits:
+            return await handler(event, data)
+
+        burst, rate = self.limits[kind]
+        user_id = event.from_user.id
+        allowed, bucket = self._allow((data["bot"].id, user_id, kind), burst, rate)
+        if allowed:
+            return await handler(event, data)
+
+        self.throttled[kind] += 1
+        self.throttled_users[(data["bot"].id, user_id)] = True
+        if self.warn and not bucket.warned:
+            bucket.warned = True
+            logger.info(f"Пользователь {user_id} ограничен ({kind})")
+            try:
+                await event.answer(THROTTLE_WARNING)
+            except Exception as e:
+                logger.warning(f"Не удалось отправить предупреждение об ограничении: {e}")
+        return None